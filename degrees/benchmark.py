@@ -0,0 +1,133 @@
+"""
+Benchmarks for the degrees search engines.
+
+Usage: python benchmark.py [directory] [pairs]
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from landmarks import Landmarks
+
+
+def random_pairs(count, seed=0):
+    """
+    Returns `count` random (source, target) pairs of person_ids.
+    """
+    rng = random.Random(seed)
+    person_ids = sorted(degrees.people)
+    return [
+        (rng.choice(person_ids), rng.choice(person_ids))
+        for _ in range(count)
+    ]
+
+
+def run_search(search, pairs):
+    """
+    Runs `search` on every pair and returns a dictionary of
+    total expanded nodes, total seconds and the path lengths found.
+    """
+    expanded = 0
+    lengths = []
+    start = time.perf_counter()
+    for source, target in pairs:
+        stats = {}
+        path = search(source, target, stats=stats)
+        expanded += stats["expanded"]
+        lengths.append(None if path is None else len(path))
+    elapsed = time.perf_counter() - start
+    return {"expanded": expanded, "seconds": elapsed, "lengths": lengths}
+
+
+def compare_searches(pairs, landmarks=4):
+    """
+    Compares plain BFS against bidirectional BFS and
+    landmark A* on `pairs`.
+    """
+    start = time.perf_counter()
+    alt = Landmarks(count=landmarks)
+    print(f"  {landmarks} landmarks selected in {time.perf_counter() - start:.2f}s")
+
+    searches = {
+        "bfs": degrees.shortest_path,
+        "bidirectional": degrees.bidirectional_shortest_path,
+        "alt": alt.shortest_path,
+    }
+    results = {name: run_search(search, pairs) for name, search in searches.items()}
+
+    baseline = results["bfs"]
+    for name, result in results.items():
+        if result["lengths"] != baseline["lengths"]:
+            raise AssertionError(f"{name} returned a different path length than bfs")
+        speedup = baseline["seconds"] / result["seconds"] if result["seconds"] else float("inf")
+        saved = 1 - result["expanded"] / baseline["expanded"] if baseline["expanded"] else 0
+        print(
+            f"  {name:>14}: {result['expanded']:>10} nodes expanded ({saved:.0%} fewer), "
+            f"{result['seconds']:.4f}s ({speedup:.1f}x)"
+        )
+    return results
+
+
+def compare_backends(directory, pairs):
+    """
+    Compares the memory held and the peak memory allocated by
+    parsing the CSVs with `load_data`, and the query latency, of
+    each graph backend on `pairs`.
+    """
+    results = {}
+    for backend in degrees.BACKENDS:
+        tracemalloc.start()
+        degrees.load_data(directory, backend=backend, cache=False)
+        memory, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = run_search(degrees.shortest_path, pairs)
+        result["memory"] = memory
+        result["peak"] = peak
+        results[backend] = result
+        latency = result["seconds"] / len(pairs) * 1000 if pairs else 0
+        print(
+            f"  {backend:>14}: {memory / 2 ** 20:>10.1f} MiB loaded, "
+            f"{peak / 2 ** 20:.1f} MiB peak, {latency:.3f}ms per query"
+        )
+    baseline = results["dict"]["peak"]
+    for backend, result in results.items():
+        print(f"  {backend:>14}: {result['peak'] / baseline:.2f}x the dict peak")
+    return results
+
+
+def report_load(stats):
+    """
+    Prints the statistics returned by `load_data`.
+    """
+    for filename, rows in stats["rows"].items():
+        print(f"  {filename:>14}: {rows:>10} rows, {stats['dropped'][filename]} dropped")
+    print(f"  {stats['seconds']:.2f}s, {stats['rows_per_second']:,.0f} rows/s")
+    if stats["peak_memory"] is not None:
+        print(f"  peak memory {stats['peak_memory'] / 2 ** 20:.1f} MiB")
+
+
+def main():
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [pairs]")
+    directory = sys.argv[1] if len(sys.argv) > 1 else "large"
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    print("Loading data...")
+    stats = degrees.load_data(directory, cache=False)
+    print("Data loaded.")
+    report_load(stats)
+
+    pairs = random_pairs(count)
+    print(f"Search on {count} random pairs")
+    compare_searches(pairs)
+
+    print(f"Backends on {count} random pairs")
+    compare_backends(directory, pairs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,16 @@
 import csv
+import gc
+import heapq
+import os
 import sys
+import time
+from array import array
+from collections import deque
+from operator import itemgetter
 
+import snapshot
+from graph import Graph
+from nameindex import NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,48 +22,228 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact CSR adjacency, set when loaded with the "csr" backend
+graph = None
 
-def load_data(directory):
+# Prefix and fuzzy index over the keys of `names`, built on first use
+name_index = None
+
+BACKENDS = ("dict", "csr")
+
+
+def load_data(directory, backend="dict", cache=True):
     """
     Load data from CSV files into memory.
+
+    Roles are always compressed into a CSR graph first. With the "dict"
+    backend, adjacency is then kept as sets inside `people` and
+    `movies`. With the "csr" backend, the compact integer-indexed
+    `graph` is kept and no sets are built.
+
+    If `cache` is true, a binary snapshot next to the CSV files is
+    memory-mapped instead of parsing the CSVs, by either backend, and
+    is written after every parse. The snapshot is rebuilt whenever a
+    CSV's mtime or size changes.
+
+    Returns a dictionary of load statistics: rows read and dropped
+    per file, seconds, rows per second and peak memory in bytes.
     """
-    # Load people
-    import os
-    print(os.getcwd())
-    current_directory = os.path.dirname(os.path.abspath(__file__))
-    print(current_directory)
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    global graph, name_index
+    started = time.perf_counter()
+    stats = {"snapshot": False}
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+    names.clear()
+    people.clear()
+    movies.clear()
+    graph = None
+    name_index = None
+
+    if cache:
+        loaded = snapshot.load(directory)
+        if loaded is not None:
+            load_snapshot(*loaded, backend=backend)
+            stats["snapshot"] = True
+            return finish_stats(stats, started)
+
+    # Nothing parsed here is garbage, so collections would only rescan
+    # the ever growing dictionaries
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        people_rows, people_dropped = read_people(directory)
+        movie_rows, movies_dropped = read_movies(directory)
+        people.update(people_rows)
+        movies.update(movie_rows)
+        del people_rows, movie_rows
+        for person_id, person in people.items():
+            names.setdefault(person["name"].lower(), set()).add(person_id)
+
+        # Roles are read straight into index arrays and compressed,
+        # so no adjacency sets are built on the way to the graph
+        person_index = {person_id: i for i, person_id in enumerate(people)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movies)}
+        persons, starring, stars_rows, stars_dropped = read_stars(directory, person_index, movie_index)
+        loaded = Graph.from_edges(person_index, movie_index, persons, starring)
+        del persons, starring
+
+        if cache:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
+                snapshot.save(directory, people, movies, loaded)
+            except OSError:
+                # A read-only data directory just means no cache
                 pass
+        if backend == "csr":
+            graph = loaded
+        else:
+            link_sets(loaded)
+    finally:
+        if collecting:
+            gc.enable()
+
+    stats["rows"] = {
+        "people": len(people) + people_dropped,
+        "movies": len(movies) + movies_dropped,
+        "stars": stars_rows,
+    }
+    stats["dropped"] = {"people": people_dropped, "movies": movies_dropped, "stars": stars_dropped}
+    return finish_stats(stats, started)
+
+
+def read_people(directory):
+    """
+    Returns ({person_id: {"name", "birth"}}, dropped)
+    for `people.csv`, where `dropped` counts malformed rows.
+    """
+    rows = {}
+    dropped = 0
+    for person_id, name, birth in read_csv(directory, "people.csv", ("id", "name", "birth")):
+        if person_id is None:
+            dropped += 1
+            continue
+        rows[person_id] = {"name": name, "birth": birth}
+    return rows, dropped
+
+
+def read_movies(directory):
+    """
+    Returns ({movie_id: {"title", "year"}}, dropped)
+    for `movies.csv`, where `dropped` counts malformed rows.
+    """
+    rows = {}
+    dropped = 0
+    for movie_id, title, year in read_csv(directory, "movies.csv", ("id", "title", "year")):
+        if movie_id is None:
+            dropped += 1
+            continue
+        rows[movie_id] = {"title": title, "year": year}
+    return rows, dropped
+
+
+def read_stars(directory, person_index, movie_index):
+    """
+    Returns (persons, movies, rows, dropped) for `stars.csv`, where
+    `persons` and `movies` are parallel arrays holding the
+    `person_index` and `movie_index` positions of every role, and
+    `dropped` counts malformed rows and rows naming an unknown
+    person or movie.
+    """
+    persons = array("i")
+    movies = array("i")
+    rows = 0
+    dropped = 0
+    for person_id, movie_id in read_csv(directory, "stars.csv", ("person_id", "movie_id")):
+        rows += 1
+        person = person_index.get(person_id)
+        movie = movie_index.get(movie_id)
+        if person is None or movie is None:
+            dropped += 1
+            continue
+        persons.append(person)
+        movies.append(movie)
+    return persons, movies, rows, dropped
+
+
+def read_csv(directory, filename, columns):
+    """
+    Yields the values of `columns` for every row of a CSV file,
+    located through its header. Blank lines are skipped and
+    malformed rows yield Nones.
+    """
+    with open(os.path.join(directory, filename), encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        try:
+            positions = [header.index(column) for column in columns]
+        except ValueError:
+            raise ValueError(f"{filename} must have columns: {', '.join(columns)}")
+        width = len(header)
+        missing = (None,) * len(columns)
+        if len(positions) == 1:
+            select = lambda row: (row[positions[0]],)
+        else:
+            select = itemgetter(*positions)
+        for row in reader:
+            if len(row) == width:
+                yield select(row)
+            elif row:
+                yield missing
+
+
+def finish_stats(stats, started):
+    """
+    Adds timing, throughput and peak memory to load statistics.
+    """
+    stats["seconds"] = time.perf_counter() - started
+    total = sum(stats.get("rows", {}).values())
+    stats["rows_per_second"] = total / stats["seconds"] if stats["seconds"] else 0
+    stats["peak_memory"] = peak_memory()
+    return stats
+
+
+def peak_memory():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where that is not available.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def load_snapshot(snapshot_people, snapshot_movies, snapshot_graph, backend="dict"):
+    """
+    Fill `names`, `people` and `movies` from a loaded snapshot.
+
+    The "csr" backend uses the memory-mapped graph as is, while the
+    "dict" backend rebuilds the adjacency sets from it.
+    """
+    global graph
+    people.update(snapshot_people)
+    movies.update(snapshot_movies)
+    for person_id, person in people.items():
+        names.setdefault(person["name"].lower(), set()).add(person_id)
+
+    if backend == "csr":
+        graph = snapshot_graph
+        return
+    link_sets(snapshot_graph)
+
+
+def link_sets(source):
+    """
+    Fill the "movies" sets of `people` and the "stars" sets of
+    `movies` from the CSR graph `source`, for the "dict" backend.
+    """
+    person_ids, movie_ids = source.person_ids, source.movie_ids
+    for i, person_id in enumerate(person_ids):
+        people[person_id]["movies"] = {movie_ids[m] for m in source.movies_of(i)}
+    for i, movie_id in enumerate(movie_ids):
+        movies[movie_id]["stars"] = {person_ids[p] for p in source.stars_of(i)}
 
 
 def main():
@@ -61,10 +251,14 @@ def main():
         sys.exit("Usage: python degrees.py [directory]")
     directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
+    # Load data from files into memory, into the compact graph,
+    # which loads fastest both from the CSVs and from the snapshot
     print("Loading data...")
-    load_data(directory)
+    stats = load_data(directory, backend="csr")
     print("Data loaded.")
+    dropped = sum(stats.get("dropped", {}).values())
+    if dropped:
+        print(f"Skipped {dropped} invalid rows.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -88,13 +282,21 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, stats=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    If `stats` is a dict, the number of expanded nodes is
+    recorded under its "expanded" key.
     """
+    if graph is not None:
+        return graph.shortest_path(source, target, stats=stats)
+
+    if stats is not None:
+        stats["expanded"] = 0
     if source == target:
         return []
 
@@ -108,7 +310,9 @@ def shortest_path(source, target):
 
         node = frontier.remove()
         visited.add(node.state)
-        
+        if stats is not None:
+            stats["expanded"] += 1
+
         for mid, pid in list(neighbors_for_person(node.state)):
             # Skip the neighbors that already visited or already in the frontier
             if pid in visited or frontier.contains_state(pid):
@@ -123,7 +327,236 @@ def shortest_path(source, target):
                 return path
 
             frontier.add(child)
-    
+
+
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching from both
+    ends at once and meeting in the middle.
+
+    Each round expands one whole BFS layer of whichever side has the
+    smaller frontier. When a layer touches the other side, the shortest
+    meeting point within that layer is used, so the result is optimal.
+
+    If no possible path, returns None.
+
+    If `stats` is a dict, the number of expanded nodes is
+    recorded under its "expanded" key.
+    """
+    if stats is not None:
+        stats["expanded"] = 0
+    if source == target:
+        return []
+
+    # Maps person_id to (movie_id, person_id) of the step towards each end
+    forward = {source: None}
+    backward = {target: None}
+    # Distance of every discovered person from its own end
+    forward_depth = {source: 0}
+    backward_depth = {target: 0}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+        # Always grow the cheaper side
+        if len(forward_layer) <= len(backward_layer):
+            layer, parents, depth = forward_layer, forward, forward_depth
+            other, other_depth = backward, backward_depth
+        else:
+            layer, parents, depth = backward_layer, backward, backward_depth
+            other, other_depth = forward, forward_depth
+
+        next_layer = []
+        best = None
+        for person_id in layer:
+            if stats is not None:
+                stats["expanded"] += 1
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor in other:
+                    length = depth[person_id] + 1 + other_depth[neighbor]
+                    if best is None or length < best[0]:
+                        best = (length, person_id, movie_id, neighbor)
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = (movie_id, person_id)
+                depth[neighbor] = depth[person_id] + 1
+                next_layer.append(neighbor)
+
+        if best is not None:
+            _, person_id, movie_id, neighbor = best
+            if parents is forward:
+                return _join_paths(forward, backward, person_id, movie_id, neighbor)
+            return _join_paths(forward, backward, neighbor, movie_id, person_id)
+
+        if parents is forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    return None
+
+
+def _join_paths(forward, backward, left, movie_id, right):
+    """
+    Returns the (movie_id, person_id) path through the edge
+    `left` -- `movie_id` -- `right`, using the parent maps
+    built by `bidirectional_shortest_path`.
+    """
+    path = []
+    person_id = left
+    while forward[person_id] is not None:
+        step_movie, parent = forward[person_id]
+        path.append((step_movie, person_id))
+        person_id = parent
+    path.reverse()
+
+    path.append((movie_id, right))
+    person_id = right
+    while backward[person_id] is not None:
+        step_movie, child = backward[person_id]
+        path.append((step_movie, child))
+        person_id = child
+    return path
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+
+    A single BFS records, for each person, every (movie_id, person_id)
+    step from the previous layer. It stops once the target's layer is
+    complete, and paths are then generated lazily by walking those
+    steps back from the target. Yields nothing if there is no path.
+    """
+    if source == target:
+        yield []
+        return
+
+    depth = {source: 0}
+    steps = {source: []}
+    layer = [source]
+    while layer and target not in depth:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor in neighbors_for_person(person_id):
+                if neighbor not in depth:
+                    depth[neighbor] = depth[person_id] + 1
+                    steps[neighbor] = []
+                    next_layer.append(neighbor)
+                if depth[neighbor] == depth[person_id] + 1:
+                    steps[neighbor].append((movie_id, person_id))
+        layer = next_layer
+
+    if target not in depth:
+        return
+
+    def walk(person_id, suffix):
+        if person_id == source:
+            yield suffix[::-1]
+            return
+        for movie_id, parent in steps[person_id]:
+            suffix.append((movie_id, person_id))
+            yield from walk(parent, suffix)
+            suffix.pop()
+
+    yield from walk(target, [])
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Yields up to `k` (or, if `k` is None, all) simple paths of
+    (movie_id, person_id) pairs from the source to the target,
+    shortest first.
+
+    Every shortest path comes straight from `all_shortest_paths`.
+    Longer paths are found Yen-style: each accepted path is branched
+    at every person on it, and a BFS that avoids the earlier part of
+    the path and the steps already taken from that person finds the
+    best detour.
+    """
+    if k is not None and k <= 0:
+        return
+
+    accepted = []
+    seen = set()
+    for path in all_shortest_paths(source, target):
+        accepted.append(path)
+        seen.add(tuple(path))
+        yield path
+        if len(accepted) == k:
+            return
+
+    candidates = []
+    counter = 0
+    branched = 0
+    while True:
+        # Branch every path accepted since the last round
+        while branched < len(accepted):
+            path = accepted[branched]
+            branched += 1
+            people_on_path = [source] + [person_id for _, person_id in path]
+            for i in range(len(path)):
+                root = path[:i]
+                spur = people_on_path[i]
+                banned_steps = {
+                    other[i] for other in accepted
+                    if len(other) > i and other[:i] == root
+                }
+                detour = _restricted_shortest_path(
+                    spur, target, set(people_on_path[:i]), banned_steps
+                )
+                if detour is None:
+                    continue
+                candidate = root + detour
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    heapq.heappush(candidates, (len(candidate), counter, candidate))
+                    counter += 1
+
+        if not candidates:
+            return
+        _, _, path = heapq.heappop(candidates)
+        accepted.append(path)
+        yield path
+        if len(accepted) == k:
+            return
+
+
+def _restricted_shortest_path(source, target, banned_people, banned_steps):
+    """
+    Returns the shortest (movie_id, person_id) path from the source
+    to the target that never visits `banned_people` and does not take
+    any (movie_id, person_id) step in `banned_steps` out of the source.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    parents = {source: None}
+    queue = deque([source])
+    while queue:
+        person_id = queue.popleft()
+        for movie_id, neighbor in neighbors_for_person(person_id):
+            if neighbor in parents or neighbor in banned_people:
+                continue
+            if person_id == source and (movie_id, neighbor) in banned_steps:
+                continue
+            parents[neighbor] = (movie_id, person_id)
+            if neighbor == target:
+                path = []
+                while parents[neighbor] is not None:
+                    movie_id, parent = parents[neighbor]
+                    path.append((movie_id, neighbor))
+                    neighbor = parent
+                path.reverse()
+                return path
+            queue.append(neighbor)
+
+    return None
+
 
 def person_id_for_name(name):
     """
@@ -132,6 +565,18 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = suggest_names(name)
+        if not suggestions:
+            return None
+        print(f"'{name}' not found. Did you mean:")
+        for i, suggestion in enumerate(suggestions, 1):
+            print(f"{i}: {suggestion}")
+        try:
+            choice = int(input("Intended Name (number): "))
+            if 1 <= choice <= len(suggestions):
+                return person_id_for_name(suggestions[choice - 1])
+        except ValueError:
+            pass
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -151,11 +596,55 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def suggest_names(name, limit=5):
+    """
+    Returns up to `limit` known names that are close to `name`,
+    best match first, as spelled in the data.
+    """
+    index = names_index()
+    if index is None:
+        return []
+    return [display_name(key) for key, _ in index.fuzzy(name, limit=limit)]
+
+
+def complete_names(prefix, limit=10):
+    """
+    Returns up to `limit` known names starting with `prefix`,
+    as spelled in the data.
+    """
+    index = names_index()
+    if index is None:
+        return []
+    return [display_name(key) for key in index.prefix(prefix, limit=limit)]
+
+
+def names_index():
+    """
+    Returns the `NameIndex` over the loaded names, building it the
+    first time it is needed, or None if no data is loaded.
+    """
+    global name_index
+    if name_index is None and names:
+        name_index = NameIndex(names)
+    return name_index
+
+
+def display_name(key):
+    """
+    Returns the name behind a lowercased key of `names`.
+    """
+    person_id = min(names[key])
+    return people[person_id]["name"]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -0,0 +1,250 @@
+"""
+Single-source BFS trees for degrees.
+
+A tree holds, for every person index, the BFS parent, the movie that
+links it to the parent and the distance from the source. Once a tree is
+built, any path to or from its source is answered by walking parent
+pointers instead of searching.
+"""
+
+import hashlib
+import os
+import struct
+from array import array
+from collections import OrderedDict, deque
+
+import degrees
+from graph import Graph
+
+MAGIC = b"DEGTREE\x02"
+HEADER = struct.Struct("<qq32s")
+
+
+class BFSTree():
+    """
+    Breadth-first search tree rooted at person index `source`.
+    Unreached people have a parent and distance of -1. `fingerprint`
+    identifies the graph the tree was built from (see `fingerprint`).
+    """
+
+    def __init__(self, source, parent, via, distance, fingerprint=None):
+        self.source = source
+        self.parent = parent
+        self.via = via
+        self.distance = distance
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, graph, source, fingerprint=None):
+        """
+        Runs a full BFS on `graph` from person index `source`.
+        """
+        n = len(graph)
+        parent = array("i", [-1]) * n
+        via = array("i", [-1]) * n
+        distance = array("i", [-1]) * n
+        parent[source] = source
+        distance[source] = 0
+
+        queue = deque([source])
+        while queue:
+            person = queue.popleft()
+            step = distance[person] + 1
+            for movie, other in graph.neighbors(person):
+                if parent[other] != -1:
+                    continue
+                parent[other] = person
+                via[other] = movie
+                distance[other] = step
+                queue.append(other)
+
+        return cls(source, parent, via, distance, fingerprint)
+
+    def save(self, path):
+        """
+        Writes the tree to `path`.
+        """
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(HEADER.pack(len(self.parent), self.source, self.fingerprint or b""))
+            for values in (self.parent, self.via, self.distance):
+                values.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a tree written by `save`.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"Not a BFS tree file: {path}")
+            n, source, fingerprint = HEADER.unpack(f.read(HEADER.size))
+            arrays = []
+            for _ in range(3):
+                values = array("i")
+                values.fromfile(f, n)
+                arrays.append(values)
+        return cls(source, *arrays, fingerprint)
+
+    def path_from(self, graph, person):
+        """
+        Returns the (movie_id, person_id) path from the source
+        to person index `person`, or None if it was not reached.
+        """
+        if self.parent[person] == -1:
+            return None
+        return graph.path_to(person, self.parent, self.via)
+
+    def path_to(self, graph, person):
+        """
+        Returns the (movie_id, person_id) path from person index
+        `person` to the source, or None if it was not reached.
+        """
+        if self.parent[person] == -1:
+            return None
+        path = []
+        while self.parent[person] != person:
+            parent = self.parent[person]
+            path.append((graph.movie_ids[self.via[person]], graph.person_ids[parent]))
+            person = parent
+        return path
+
+
+class SourceTrees():
+    """
+    Answers path and distance queries from precomputed BFS trees.
+
+    The `capacity` most recently used trees are kept in memory. If
+    `directory` is given, trees are also persisted there, one file per
+    source, and read back instead of being recomputed. Persisted trees
+    refer to person indices, so each file records the fingerprint of
+    the graph it was built from, and a tree whose fingerprint does not
+    match the current graph is rebuilt.
+    """
+
+    def __init__(self, graph=None, capacity=8, directory=None):
+        self.graph = graph if graph is not None else current_graph()
+        self.capacity = capacity
+        self.directory = directory
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._fingerprint = None
+
+    @property
+    def fingerprint(self):
+        """
+        The fingerprint of `graph`, computed on first use.
+        """
+        if self._fingerprint is None:
+            self._fingerprint = fingerprint(self.graph)
+        return self._fingerprint
+
+    def tree(self, person_id):
+        """
+        Returns the BFS tree rooted at `person_id`, building it if needed.
+        """
+        if person_id in self.trees:
+            self.hits += 1
+            self.trees.move_to_end(person_id)
+            return self.trees[person_id]
+
+        self.misses += 1
+        path = self.path_for(person_id)
+        tree = None
+        if path is not None and os.path.exists(path):
+            try:
+                tree = BFSTree.load(path)
+            except (ValueError, EOFError, struct.error):
+                tree = None
+            if tree is None or tree.fingerprint != self.fingerprint:
+                # Built from another dataset, or unreadable
+                self.stale += 1
+                tree = None
+        if tree is None:
+            index = self.graph.person_index[person_id]
+            if path is None:
+                tree = BFSTree.build(self.graph, index)
+            else:
+                tree = BFSTree.build(self.graph, index, self.fingerprint)
+                tree.save(path)
+
+        self.trees[person_id] = tree
+        if len(self.trees) > self.capacity:
+            self.trees.popitem(last=False)
+        return tree
+
+    def precompute(self, person_id):
+        """
+        Builds and persists the tree for `person_id` ahead of queries.
+        """
+        self.tree(person_id)
+
+    def path_for(self, person_id):
+        """
+        Returns the file the tree for `person_id` is persisted to, if any.
+        """
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, f"{person_id}.bfs")
+
+    def cached(self, person_id):
+        """
+        Returns True if a tree for `person_id` is in memory or on disk.
+        """
+        if person_id in self.trees:
+            return True
+        path = self.path_for(person_id)
+        return path is not None and os.path.exists(path)
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs that
+        connect the source to the target, using a tree rooted at
+        either end. If no possible path, returns None.
+        """
+        if self.cached(target) and not self.cached(source):
+            tree = self.tree(target)
+            return tree.path_to(self.graph, self.graph.person_index[source])
+        tree = self.tree(source)
+        return tree.path_from(self.graph, self.graph.person_index[target])
+
+    def distance(self, source, target):
+        """
+        Returns the degrees of separation between two people,
+        or None if they are not connected.
+        """
+        if self.cached(target) and not self.cached(source):
+            source, target = target, source
+        distance = self.tree(source).distance[self.graph.person_index[target]]
+        return None if distance == -1 else distance
+
+
+def fingerprint(graph):
+    """
+    Returns a SHA-256 digest of the people, movies and links of `graph`.
+    Each person's movies are hashed in sorted order, so every load of
+    the same data gives the same digest, whatever order the links were
+    added in.
+    """
+    digest = hashlib.sha256()
+    for ids in (graph.person_ids, graph.movie_ids):
+        digest.update(struct.pack("<q", len(ids)))
+        digest.update("\0".join(ids).encode("utf-8"))
+    digest.update(array("q", graph.person_offsets))
+    links = array("i")
+    for person in range(len(graph)):
+        links.extend(sorted(graph.movies_of(person)))
+    digest.update(links)
+    return digest.digest()
+
+
+def current_graph():
+    """
+    Returns the loaded CSR graph, building one from the
+    dict backend if that is what was loaded.
+    """
+    if degrees.graph is not None:
+        return degrees.graph
+    return Graph.from_dicts(degrees.people, degrees.movies)
@@ -0,0 +1,211 @@
+from array import array
+from collections import Counter, deque
+from itertools import accumulate, repeat
+
+
+class Graph():
+    """
+    Compact person <-> movie graph.
+
+    People and movies are numbered densely from 0, and the bipartite
+    adjacency is stored in compressed sparse row form: the movies of
+    person `p` are `person_movies[person_offsets[p]:person_offsets[p + 1]]`
+    and the stars of movie `m` are
+    `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people,
+                 person_index=None, movie_index=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {pid: i for i, pid in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+    @classmethod
+    def from_dicts(cls, people, movies):
+        """
+        Builds a graph from the `people` and `movies` dictionaries
+        filled by `degrees.load_data`.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        person_index = {pid: i for i, pid in enumerate(person_ids)}
+        movie_index = {mid: i for i, mid in enumerate(movie_ids)}
+
+        person_offsets, person_movies = _compress(
+            (movie_index[mid] for mid in people[pid]["movies"])
+            for pid in person_ids
+        )
+        movie_offsets, movie_people = _compress(
+            (person_index[pid] for pid in movies[mid]["stars"])
+            for mid in movie_ids
+        )
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies,
+                   movie_offsets, movie_people)
+
+    @classmethod
+    def from_edges(cls, person_index, movie_index, persons, movies):
+        """
+        Builds a graph from parallel arrays of person and movie
+        indices, one pair per starring role, without building
+        adjacency sets first. `person_index` and `movie_index` map
+        ids to those indices in order. Repeated pairs are kept once.
+        """
+        person_offsets, person_movies = _group(persons, movies, len(person_index))
+        person_offsets, person_movies, persons = _unique(person_offsets, person_movies, len(movie_index))
+        movie_offsets, movie_people = _group(person_movies, persons, len(movie_index))
+        return cls(list(person_index), list(movie_index),
+                   person_offsets, person_movies,
+                   movie_offsets, movie_people,
+                   person_index=person_index, movie_index=movie_index)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices of person index `person`.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices of movie index `movie`.
+        """
+        return self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with person index `person`.
+        """
+        for movie in self.movies_of(person):
+            for other in self.stars_of(movie):
+                yield movie, other
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        person_ids, movie_ids = self.person_ids, self.movie_ids
+        return {
+            (movie_ids[movie], person_ids[other])
+            for movie, other in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, running BFS on
+        integer indices.
+
+        If no possible path, returns None.
+        """
+        if stats is not None:
+            stats["expanded"] = 0
+        if source == target:
+            return []
+
+        start = self.person_index[source]
+        goal = self.person_index[target]
+        parent = array("i", [-1]) * len(self)
+        via = array("i", [-1]) * len(self)
+        parent[start] = start
+
+        queue = deque([start])
+        while queue:
+            person = queue.popleft()
+            if stats is not None:
+                stats["expanded"] += 1
+            for movie, other in self.neighbors(person):
+                if parent[other] != -1:
+                    continue
+                parent[other] = person
+                via[other] = movie
+                if other == goal:
+                    return self.path_to(goal, parent, via)
+                queue.append(other)
+
+        return None
+
+    def path_to(self, person, parent, via):
+        """
+        Walks the `parent` and `via` arrays back from person index
+        `person` to the root and returns the (movie_id, person_id) path.
+        """
+        path = []
+        while parent[person] != person:
+            path.append((self.movie_ids[via[person]], self.person_ids[person]))
+            person = parent[person]
+        path.reverse()
+        return path
+
+    def nbytes(self):
+        """
+        Returns the number of bytes used by the adjacency arrays.
+        """
+        return sum(
+            len(a) * a.itemsize for a in (
+                self.person_offsets, self.person_movies,
+                self.movie_offsets, self.movie_people,
+            )
+        )
+
+
+def _compress(rows):
+    """
+    Returns (offsets, values) arrays for an iterable of integer rows.
+    """
+    offsets = array("q", [0])
+    values = array("i")
+    for row in rows:
+        values.extend(row)
+        offsets.append(len(values))
+    return offsets, values
+
+
+def _group(keys, values, count):
+    """
+    Returns (offsets, values) arrays of `values` grouped by the
+    matching `keys`, which are integers below `count`.
+    """
+    counts = Counter(keys)
+    offsets = array("q", accumulate(map(counts.get, range(count), repeat(0)), initial=0))
+    cursor = array("q", offsets)
+    grouped = array("i", bytes(len(values) * 4))
+    for key, value in zip(keys, values):
+        grouped[cursor[key]] = value
+        cursor[key] += 1
+    return offsets, grouped
+
+
+def _unique(offsets, values, width):
+    """
+    Returns (offsets, values, keys) arrays with repeated values
+    dropped from every row, where `keys` holds the row of each
+    value kept and values are integers below `width`.
+    """
+    seen = array("i", [-1]) * width
+    unique_offsets = array("q", [0])
+    unique = array("i")
+    keys = array("i")
+    for row in range(len(offsets) - 1):
+        for value in values[offsets[row]:offsets[row + 1]]:
+            if seen[value] != row:
+                seen[value] = row
+                unique.append(value)
+                keys.append(row)
+        unique_offsets.append(len(unique))
+    return unique_offsets, unique, keys
@@ -0,0 +1,137 @@
+"""
+Landmark-based A* (ALT) search for degrees.
+
+BFS distances from a few landmark people give a lower bound on the
+distance between any two people, by the triangle inequality:
+d(v, t) >= |d(L, t) - d(L, v)|. A* guided by that bound returns the
+same optimal paths as BFS while expanding far fewer people.
+"""
+
+import math
+from array import array
+
+from distances import BFSTree, current_graph
+from util import Node, PriorityFrontier
+
+
+class Landmarks():
+    """
+    A* search over the CSR graph with landmark distance heuristics.
+    """
+
+    def __init__(self, graph=None, count=4):
+        self.graph = graph if graph is not None else current_graph()
+        self.trees = landmark_trees(self.graph, count)
+
+    @property
+    def landmarks(self):
+        return [tree.source for tree in self.trees]
+
+    def heuristic(self, person, goal):
+        """
+        Returns a lower bound on the distance between person indices
+        `person` and `goal`, or infinity if they cannot be connected.
+        """
+        bound = 0
+        for tree in self.trees:
+            a, b = tree.distance[person], tree.distance[goal]
+            if a == -1 and b == -1:
+                continue
+            if a == -1 or b == -1:
+                # Only one of them is reachable from this landmark
+                return math.inf
+            bound = max(bound, abs(a - b))
+        return bound
+
+    def shortest_path(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+
+        If `stats` is a dict, the number of expanded nodes is
+        recorded under its "expanded" key.
+        """
+        if stats is not None:
+            stats["expanded"] = 0
+        if source == target:
+            return []
+
+        graph = self.graph
+        start = graph.person_index[source]
+        goal = graph.person_index[target]
+        if self.heuristic(start, goal) == math.inf:
+            return None
+
+        frontier = PriorityFrontier()
+        frontier.add(Node(state=start, parent=None, action=None), priority=self.heuristic(start, goal))
+        cost = {start: 0}
+        explored = set()
+
+        while not frontier.empty():
+            node = frontier.remove()
+            if node.state in explored:
+                # A cheaper copy of this person was already expanded
+                continue
+            if node.state == goal:
+                path = []
+                while node.parent:
+                    path.append((graph.movie_ids[node.action], graph.person_ids[node.state]))
+                    node = node.parent
+                path.reverse()
+                return path
+
+            explored.add(node.state)
+            if stats is not None:
+                stats["expanded"] += 1
+
+            step = cost[node.state] + 1
+            for movie, person in graph.neighbors(node.state):
+                if person in explored or step >= cost.get(person, math.inf):
+                    continue
+                estimate = self.heuristic(person, goal)
+                if estimate == math.inf:
+                    continue
+                cost[person] = step
+                child = Node(state=person, parent=node, action=movie)
+                frontier.add(child, priority=step + estimate)
+
+        return None
+
+
+def select_landmarks(graph, count):
+    """
+    Returns up to `count` person indices spread across `graph`.
+
+    The first landmark is the person with the most movies, and every
+    next one is the person in the same component that is farthest from
+    all landmarks chosen so far.
+    """
+    return [tree.source for tree in landmark_trees(graph, count)]
+
+
+def landmark_trees(graph, count):
+    """
+    Returns the BFS trees of the landmarks chosen by `select_landmarks`,
+    which that choice has to build anyway.
+    """
+    if count <= 0 or len(graph) == 0:
+        return []
+
+    offsets = graph.person_offsets
+    first = max(range(len(graph)), key=lambda p: offsets[p + 1] - offsets[p])
+    trees = [BFSTree.build(graph, first)]
+    nearest = array("i", trees[0].distance)
+
+    while len(trees) < count:
+        # Unreached people (-1) are in other components and never chosen
+        candidate = max(range(len(graph)), key=nearest.__getitem__)
+        if nearest[candidate] <= 0:
+            break
+        trees.append(BFSTree.build(graph, candidate))
+        for p, d in enumerate(trees[-1].distance):
+            if d != -1 and d < nearest[p]:
+                nearest[p] = d
+
+    return trees
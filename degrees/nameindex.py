@@ -0,0 +1,73 @@
+"""
+Name lookup index for degrees.
+
+Names are kept lowercased in a sorted list, so prefix lookups are a
+bisect plus a short scan. A trigram index over the same list narrows
+fuzzy lookups down to a few candidates before they are scored.
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from difflib import SequenceMatcher
+
+# How many trigram candidates are scored per fuzzy lookup
+CANDIDATES = 50
+
+
+class NameIndex():
+    """
+    Prefix and fuzzy lookup over a collection of names.
+    """
+
+    def __init__(self, names):
+        self.keys = sorted(name.lower() for name in names)
+        self.trigrams = {}
+        for i, key in enumerate(self.keys):
+            for trigram in set(trigrams(key)):
+                self.trigrams.setdefault(trigram, array("i")).append(i)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while i < len(self.keys) and len(matches) < limit and self.keys[i].startswith(prefix):
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, name, limit=5, cutoff=0.6):
+        """
+        Returns up to `limit` (name, score) pairs for the names most
+        similar to `name`, best first. Scores are between 0 and 1 and
+        names scoring below `cutoff` are left out.
+        """
+        name = name.lower()
+        shared = Counter()
+        for trigram in set(trigrams(name)):
+            shared.update(self.trigrams.get(trigram, ()))
+
+        scored = []
+        matcher = SequenceMatcher(b=name)
+        for i, _ in shared.most_common(CANDIDATES):
+            matcher.set_seq1(self.keys[i])
+            score = matcher.ratio()
+            if score >= cutoff:
+                scored.append((score, self.keys[i]))
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(key, score) for score, key in scored[:limit]]
+
+
+def trigrams(text):
+    """
+    Returns the trigrams of `text`, padded so that
+    the start and end of the text count too.
+    """
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
@@ -0,0 +1,208 @@
+"""
+Long-running query modes for degrees.
+
+The graph is loaded once and shared by a pool of worker processes,
+which inherit it when they are forked.
+
+Usage: python service.py directory batch pairs.csv [output.jsonl]
+       python service.py directory serve [port]
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+def resolve(name, fuzzy=True):
+    """
+    Returns the person_id for a name or person_id, without prompting.
+    If there is no exact match and `fuzzy` is true, the closest known
+    name is used instead. Raises LookupError if the person is unknown
+    or the name is ambiguous.
+    """
+    if name in degrees.people:
+        return name
+    person_ids = degrees.names.get(name.lower(), set())
+    if not person_ids and fuzzy:
+        suggestions = degrees.suggest_names(name, limit=1)
+        if suggestions:
+            person_ids = degrees.names[suggestions[0].lower()]
+    if not person_ids:
+        raise LookupError(f"Person not found: {name}")
+    if len(person_ids) > 1:
+        raise LookupError(f"Ambiguous name: {name} ({', '.join(sorted(person_ids))})")
+    return next(iter(person_ids))
+
+
+def answer(source_name, target_name):
+    """
+    Returns a JSON-serialisable dictionary answering a single query.
+    """
+    result = {"source": source_name, "target": target_name}
+    try:
+        source = resolve(source_name)
+        target = resolve(target_name)
+    except LookupError as e:
+        result["error"] = str(e)
+        return result
+    result["resolved"] = {
+        "source": degrees.people[source]["name"],
+        "target": degrees.people[target]["name"],
+    }
+
+    path = degrees.shortest_path(source, target)
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+        return result
+
+    result["degrees"] = len(path)
+    result["path"] = [
+        {
+            "movie_id": movie_id,
+            "title": degrees.movies[movie_id]["title"],
+            "person_id": person_id,
+            "name": degrees.people[person_id]["name"],
+        }
+        for movie_id, person_id in path
+    ]
+    return result
+
+
+def answer_pair(pair):
+    """
+    Returns `answer` for a (source_name, target_name) pair.
+    """
+    return answer(*pair)
+
+
+def init_worker(directory, backend):
+    """
+    Loads the data in a worker, unless it was inherited from the parent.
+    """
+    if not degrees.people:
+        degrees.load_data(directory, backend=backend)
+
+
+def make_pool(directory, backend, workers):
+    """
+    Returns a process pool whose workers share the loaded graph
+    and name index.
+    """
+    # Build the index before forking, so workers do not each build it
+    # on their first fuzzy lookup
+    degrees.names_index()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    return context.Pool(workers, initializer=init_worker, initargs=(directory, backend))
+
+
+def read_pairs(f):
+    """
+    Yields (source_name, target_name) pairs from a CSV file,
+    skipping blank lines.
+    """
+    for row in csv.reader(f):
+        if not row:
+            continue
+        if len(row) != 2:
+            raise ValueError(f"Expected two names per line, got: {row}")
+        yield row[0].strip(), row[1].strip()
+
+
+def run_batch(pool, infile, outfile, chunksize=16):
+    """
+    Answers every pair in `infile` on `pool` and writes one JSON
+    line per pair to `outfile`, in input order.
+    Returns the number of queries answered.
+    """
+    count = 0
+    for result in pool.imap(answer_pair, read_pairs(infile), chunksize):
+        outfile.write(json.dumps(result) + "\n")
+        count += 1
+    return count
+
+
+def make_server(pool, host="127.0.0.1", port=8000):
+    """
+    Returns an HTTP server answering GET /path?source=...&target=...
+    on `pool`. Each request runs on its own thread, so several
+    queries can be in flight across the workers at once.
+
+    GET /complete?prefix=... returns name completions.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if url.path == "/complete" and "prefix" in query:
+                self.respond(200, {"names": degrees.complete_names(query["prefix"][0])})
+                return
+            if url.path != "/path" or "source" not in query or "target" not in query:
+                self.respond(400, {"error": "Usage: /path?source=NAME&target=NAME"})
+                return
+            result = pool.apply(answer, (query["source"][0], query["target"][0]))
+            self.respond(404 if "error" in result else 200, result)
+
+        def respond(self, status, body):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer many degrees queries on one loaded graph.")
+    parser.add_argument("directory")
+    parser.add_argument("--backend", choices=degrees.BACKENDS, default="csr")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    commands = parser.add_subparsers(dest="command", required=True)
+    batch = commands.add_parser("batch", help="answer a CSV file of name pairs")
+    batch.add_argument("pairs")
+    batch.add_argument("output", nargs="?")
+    serve = commands.add_parser("serve", help="answer queries over HTTP")
+    serve.add_argument("port", nargs="?", type=int, default=8000)
+    serve.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, backend=args.backend)
+    print("Data loaded.", file=sys.stderr)
+
+    with make_pool(args.directory, args.backend, args.workers) as pool:
+        if args.command == "batch":
+            with open(args.pairs, encoding="utf-8") as infile:
+                if args.output:
+                    with open(args.output, "w", encoding="utf-8") as outfile:
+                        count = run_batch(pool, infile, outfile)
+                else:
+                    count = run_batch(pool, infile, sys.stdout)
+            print(f"{count} queries answered.", file=sys.stderr)
+        else:
+            server = make_server(pool, args.host, args.port)
+            print(f"Serving on http://{args.host}:{server.server_port}/path", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Binary snapshot of a loaded degrees dataset.
+
+A snapshot file starts with an 8 byte magic, an 8 byte header length and
+a JSON header. The header records the mtime and size of every source CSV
+and the position of each data section. Sections are 8 byte aligned, so
+the CSR arrays can be used straight from a read-only memory map, and the
+string tables are NUL separated UTF-8 blobs.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+
+from graph import Graph
+
+MAGIC = b"DEGSNAP\x01"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+ARRAYS = ("person_offsets", "person_movies", "movie_offsets", "movie_people")
+STRINGS = ("person_ids", "names", "births", "movie_ids", "titles", "years")
+
+
+def path_for(directory):
+    """
+    Returns the snapshot path for a data directory.
+    """
+    return os.path.join(directory, FILENAME)
+
+
+def source_stamps(directory):
+    """
+    Returns the (mtime_ns, size) of each source CSV in `directory`.
+    """
+    stamps = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        stamps[filename] = [stat.st_mtime_ns, stat.st_size]
+    return stamps
+
+
+def save(directory, people, movies, graph):
+    """
+    Writes a snapshot of `people`, `movies` and `graph` for `directory`.
+    The file is written under a temporary name and moved into place.
+    """
+    person_ids = graph.person_ids
+    movie_ids = graph.movie_ids
+    strings = {
+        "person_ids": person_ids,
+        "names": [people[pid]["name"] for pid in person_ids],
+        "births": [people[pid]["birth"] for pid in person_ids],
+        "movie_ids": movie_ids,
+        "titles": [movies[mid]["title"] for mid in movie_ids],
+        "years": [movies[mid]["year"] for mid in movie_ids],
+    }
+    blobs = {}
+    for name in ARRAYS:
+        blobs[name] = bytes(getattr(graph, name))
+    for name in STRINGS:
+        blobs[name] = "\0".join(strings[name]).encode("utf-8")
+
+    # Lay out the sections, then write the header in front of them
+    sections = {}
+    offset = 0
+    for name, blob in blobs.items():
+        sections[name] = [offset, len(blob)]
+        offset += _padded(len(blob))
+    for name in ARRAYS:
+        # Arrays built in memory have a typecode, mapped ones a format
+        values = getattr(graph, name)
+        sections[name].append(getattr(values, "typecode", None) or values.format)
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "sources": source_stamps(directory),
+        "sections": sections,
+    }).encode("utf-8")
+    start = _padded(len(MAGIC) + 8 + len(header))
+
+    path = path_for(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (start - f.tell()))
+        for name, blob in blobs.items():
+            f.write(blob)
+            f.write(b"\0" * (_padded(len(blob)) - len(blob)))
+    os.replace(temporary, path)
+
+
+def load(directory):
+    """
+    Returns (people, movies, graph) from the snapshot for `directory`,
+    or None if there is no snapshot or it is out of date.
+
+    The graph arrays are memory-mapped views into the snapshot file.
+    `people` and `movies` hold names, births, titles and years only.
+    """
+    path = path_for(directory)
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(buffer)
+    try:
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            return None
+        (length,) = struct.unpack("<Q", view[len(MAGIC):len(MAGIC) + 8])
+        header = json.loads(bytes(view[len(MAGIC) + 8:len(MAGIC) + 8 + length]))
+        if header["byteorder"] != sys.byteorder:
+            return None
+        if header["sources"] != source_stamps(directory):
+            return None
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+    start = _padded(len(MAGIC) + 8 + length)
+    sections = header["sections"]
+
+    def section(name):
+        offset, size = sections[name][:2]
+        return view[start + offset:start + offset + size]
+
+    arrays = {
+        name: section(name).cast(sections[name][2])
+        for name in ARRAYS
+    }
+    counts = {
+        "person": len(arrays["person_offsets"]) - 1,
+        "movie": len(arrays["movie_offsets"]) - 1,
+    }
+    strings = {}
+    for name in STRINGS:
+        count = counts["person" if name in ("person_ids", "names", "births") else "movie"]
+        strings[name] = bytes(section(name)).decode("utf-8").split("\0") if count else []
+
+    people = {
+        pid: {"name": name, "birth": birth}
+        for pid, name, birth in zip(strings["person_ids"], strings["names"], strings["births"])
+    }
+    movies = {
+        mid: {"title": title, "year": year}
+        for mid, title, year in zip(strings["movie_ids"], strings["titles"], strings["years"])
+    }
+    graph = Graph(strings["person_ids"], strings["movie_ids"], **arrays)
+    return people, movies, graph
+
+
+def _padded(size):
+    """
+    Returns `size` rounded up to a multiple of 8.
+    """
+    return (size + 7) & ~7
@@ -0,0 +1,227 @@
+import os
+import shutil
+from array import array
+
+import pytest
+import degrees
+import snapshot
+from graph import Graph
+from degrees import (
+    load_data, shortest_path, bidirectional_shortest_path,
+    all_shortest_paths, k_shortest_paths,
+)
+
+KEVIN_BACON = "102"
+TOM_HANKS = "158"
+TOM_CRUISE = "129"
+EMMA_WATSON = "914612"
+CARY_ELWES = "144"
+
+
+@pytest.fixture(autouse=True)
+def small():
+    load_data("small")
+
+
+def assert_valid_path(source, target, path):
+    # Every step must be a movie that both people starred in
+    person_id = source
+    for movie_id, next_id in path:
+        assert movie_id in degrees.people[person_id]["movies"]
+        assert movie_id in degrees.people[next_id]["movies"]
+        person_id = next_id
+    assert person_id == target
+
+
+def test_shortest_path():
+    path = shortest_path(KEVIN_BACON, TOM_HANKS)
+    assert path == [("112384", TOM_HANKS)]
+    assert shortest_path(KEVIN_BACON, KEVIN_BACON) == []
+    assert shortest_path(KEVIN_BACON, EMMA_WATSON) is None
+
+
+def test_bidirectional_shortest_path():
+    for source in degrees.people:
+        for target in degrees.people:
+            expected = shortest_path(source, target)
+            path = bidirectional_shortest_path(source, target)
+            if expected is None:
+                assert path is None
+            else:
+                assert len(path) == len(expected)
+                assert_valid_path(source, target, path)
+
+
+def test_bidirectional_expands_fewer_nodes():
+    bfs_stats, bidirectional_stats = {}, {}
+    shortest_path(CARY_ELWES, TOM_CRUISE, stats=bfs_stats)
+    bidirectional_shortest_path(CARY_ELWES, TOM_CRUISE, stats=bidirectional_stats)
+    assert bidirectional_stats["expanded"] <= bfs_stats["expanded"]
+
+
+def simple_paths(source, target, visited=None):
+    # Every simple path by brute force, for checking the path enumerators
+    if source == target:
+        yield []
+        return
+    visited = (visited or set()) | {source}
+    for movie_id, person_id in degrees.neighbors_for_person(source):
+        if person_id not in visited:
+            for rest in simple_paths(person_id, target, visited):
+                yield [(movie_id, person_id)] + rest
+
+
+def test_all_shortest_paths():
+    for source, target in [(CARY_ELWES, TOM_CRUISE), (KEVIN_BACON, TOM_HANKS), (TOM_HANKS, TOM_CRUISE)]:
+        paths = list(simple_paths(source, target))
+        shortest = min(len(path) for path in paths)
+        expected = sorted(path for path in paths if len(path) == shortest)
+        assert sorted(all_shortest_paths(source, target)) == expected
+    assert list(all_shortest_paths(KEVIN_BACON, KEVIN_BACON)) == [[]]
+    assert list(all_shortest_paths(KEVIN_BACON, EMMA_WATSON)) == []
+
+
+def test_k_shortest_paths():
+    source, target = CARY_ELWES, TOM_CRUISE
+    expected = sorted(simple_paths(source, target), key=len)
+    paths = list(k_shortest_paths(source, target))
+    assert [len(path) for path in paths] == [len(path) for path in expected]
+    assert sorted(paths) == sorted(expected)
+
+    assert [len(path) for path in k_shortest_paths(source, target, k=5)] == [len(path) for path in expected[:5]]
+    assert list(k_shortest_paths(source, target, k=0)) == []
+    assert list(k_shortest_paths(KEVIN_BACON, EMMA_WATSON, k=3)) == []
+
+
+def test_k_shortest_paths_is_lazy():
+    paths = k_shortest_paths(KEVIN_BACON, TOM_CRUISE)
+    assert next(paths) == [("104257", TOM_CRUISE)]
+
+
+def test_csr_backend():
+    expected = {
+        (source, target): shortest_path(source, target)
+        for source in degrees.people for target in degrees.people
+    }
+    neighbors = degrees.neighbors_for_person(KEVIN_BACON)
+
+    load_data("small", backend="csr")
+    assert degrees.graph is not None
+    assert "movies" not in degrees.people[KEVIN_BACON]
+    assert degrees.neighbors_for_person(KEVIN_BACON) == neighbors
+    for (source, target), path in expected.items():
+        for search in (shortest_path, bidirectional_shortest_path):
+            result = search(source, target)
+            if path is None:
+                assert result is None
+            else:
+                assert len(result) == len(path)
+
+
+def test_graph_from_edges():
+    expected = Graph.from_dicts(degrees.people, degrees.movies)
+    person_index = expected.person_index
+    movie_index = expected.movie_index
+    roles = [
+        (person_index[pid], movie_index[mid])
+        for pid, person in degrees.people.items() for mid in person["movies"]
+    ]
+    # A repeated role is only linked once
+    roles.append(roles[0])
+    graph = Graph.from_edges(
+        person_index, movie_index,
+        array("i", [p for p, _ in roles]), array("i", [m for _, m in roles]),
+    )
+    for person in range(len(graph)):
+        assert sorted(graph.movies_of(person)) == sorted(expected.movies_of(person))
+    for movie in range(len(graph.movie_ids)):
+        assert sorted(graph.stars_of(movie)) == sorted(expected.stars_of(movie))
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        load_data("small", backend="sqlite")
+
+
+def test_name_lookup():
+    assert degrees.person_id_for_name("kevin bacon") == KEVIN_BACON
+    # Exact lookups do not need the index
+    assert degrees.name_index is None
+    assert degrees.suggest_names("Kevn Bacon")[0] == "Kevin Bacon"
+    assert len(degrees.name_index) == len(degrees.names)
+    assert degrees.complete_names("to") == ["Tom Cruise", "Tom Hanks"]
+
+
+def test_load_stats(tmp_path):
+    directory = tmp_path / "small"
+    shutil.copytree("small", directory, ignore=shutil.ignore_patterns(snapshot.FILENAME))
+    with open(directory / "stars.csv", "a") as f:
+        f.write("999,112384\n")
+        f.write("102,999\n")
+        f.write("102\n")
+    with open(directory / "people.csv", "a") as f:
+        f.write("999,\"Nobody\",1990\n")
+        f.write("1000\n")
+
+    stats = load_data(directory, cache=False, backend="csr")
+    assert not stats["snapshot"]
+    assert stats["rows"] == {"people": 18, "movies": 5, "stars": 23}
+    assert stats["dropped"] == {"people": 1, "movies": 0, "stars": 2}
+    assert stats["rows_per_second"] > 0
+    assert degrees.names["nobody"] == {"999"}
+
+    load_data(directory)
+    assert load_data(directory)["snapshot"]
+
+
+def test_read_stars():
+    person_index = {pid: i for i, pid in enumerate(degrees.people)}
+    movie_index = {mid: i for i, mid in enumerate(degrees.movies)}
+    persons, movies, rows, dropped = degrees.read_stars("small", person_index, movie_index)
+    assert (rows, dropped) == (20, 0)
+    person_ids, movie_ids = list(person_index), list(movie_index)
+    roles = {(person_ids[p], movie_ids[m]) for p, m in zip(persons, movies)}
+    assert roles == {
+        (pid, mid) for pid, person in degrees.people.items() for mid in person["movies"]
+    }
+
+
+def test_snapshot(tmp_path):
+    directory = tmp_path / "small"
+    shutil.copytree("small", directory, ignore=shutil.ignore_patterns(snapshot.FILENAME))
+    # The default load, as run by the command line, leaves a snapshot behind
+    stats = load_data(directory)
+    assert not stats["snapshot"]
+    expected = shortest_path(CARY_ELWES, TOM_CRUISE)
+    assert os.path.exists(snapshot.path_for(directory))
+
+    for backend in degrees.BACKENDS:
+        assert snapshot.load(directory) is not None
+        load_data(directory, backend=backend)
+        assert degrees.people[KEVIN_BACON]["name"] == "Kevin Bacon"
+        assert degrees.names["kevin bacon"] == {KEVIN_BACON}
+        assert len(shortest_path(CARY_ELWES, TOM_CRUISE)) == len(expected)
+
+    assert degrees.neighbors_for_person(KEVIN_BACON) == {
+        ("104257", KEVIN_BACON), ("104257", TOM_CRUISE), ("104257", "193"), ("104257", "197"),
+        ("112384", KEVIN_BACON), ("112384", TOM_HANKS), ("112384", "200"), ("112384", "641"),
+    }
+
+
+def test_snapshot_invalidated(tmp_path):
+    directory = tmp_path / "small"
+    shutil.copytree("small", directory, ignore=shutil.ignore_patterns(snapshot.FILENAME))
+    load_data(directory)
+    assert snapshot.load(directory) is not None
+
+    # Emma Watson joins Apollo 13
+    with open(directory / "stars.csv", "a") as f:
+        f.write(f"{EMMA_WATSON},112384\n")
+    assert snapshot.load(directory) is None
+    load_data(directory)
+    assert shortest_path(KEVIN_BACON, EMMA_WATSON) == [("112384", EMMA_WATSON)]
+    assert snapshot.load(directory) is not None
+
+
+if __name__ == "__main__":
+    pytest.main()
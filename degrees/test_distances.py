@@ -0,0 +1,105 @@
+import os
+import shutil
+
+import pytest
+import degrees
+import snapshot
+from distances import BFSTree, SourceTrees, current_graph, fingerprint
+
+KEVIN_BACON = "102"
+TOM_CRUISE = "129"
+CARY_ELWES = "144"
+EMMA_WATSON = "914612"
+
+
+@pytest.fixture(autouse=True)
+def small():
+    degrees.load_data("small", backend="csr")
+
+
+def test_bfs_tree_save_and_load(tmp_path):
+    graph = current_graph()
+    tree = BFSTree.build(graph, graph.person_index[KEVIN_BACON])
+    tree.save(tmp_path / "tree.bfs")
+    loaded = BFSTree.load(tmp_path / "tree.bfs")
+    assert loaded.source == tree.source
+    assert loaded.parent == tree.parent
+    assert loaded.via == tree.via
+    assert loaded.distance == tree.distance
+    assert loaded.distance[graph.person_index[EMMA_WATSON]] == -1
+
+
+def test_source_trees_match_search():
+    trees = SourceTrees()
+    for source in degrees.people:
+        for target in degrees.people:
+            expected = degrees.shortest_path(source, target)
+            path = trees.shortest_path(source, target)
+            if expected is None:
+                assert path is None
+                assert trees.distance(source, target) is None
+            else:
+                assert len(path) == len(expected)
+                assert trees.distance(source, target) == len(expected)
+                if path:
+                    assert path[-1][1] == target
+
+
+def test_source_trees_reverse_lookup():
+    trees = SourceTrees()
+    trees.precompute(KEVIN_BACON)
+    path = trees.shortest_path(CARY_ELWES, KEVIN_BACON)
+    assert len(path) == len(degrees.shortest_path(CARY_ELWES, KEVIN_BACON))
+    assert path[-1][1] == KEVIN_BACON
+    # Answered from the Kevin Bacon tree, so no new tree was built
+    assert trees.misses == 1
+    assert list(trees.trees) == [KEVIN_BACON]
+
+
+def test_source_trees_lru_and_persistence(tmp_path):
+    trees = SourceTrees(capacity=2, directory=tmp_path)
+    for person_id in [KEVIN_BACON, TOM_CRUISE, KEVIN_BACON, CARY_ELWES]:
+        trees.tree(person_id)
+    assert list(trees.trees) == [KEVIN_BACON, CARY_ELWES]
+    assert trees.hits == 1
+    assert os.path.exists(tmp_path / f"{TOM_CRUISE}.bfs")
+
+    degrees.load_data("small", backend="dict")
+    reloaded = SourceTrees(directory=tmp_path)
+    assert reloaded.cached(TOM_CRUISE)
+    assert reloaded.distance(TOM_CRUISE, CARY_ELWES) == len(degrees.shortest_path(TOM_CRUISE, CARY_ELWES))
+
+
+def test_fingerprint_ignores_backend():
+    csr = fingerprint(current_graph())
+    degrees.load_data("small", backend="dict")
+    assert fingerprint(current_graph()) == csr
+
+
+def test_stale_trees_rebuilt(tmp_path):
+    directory = tmp_path / "small"
+    shutil.copytree("small", directory, ignore=shutil.ignore_patterns(snapshot.FILENAME))
+    degrees.load_data(directory, backend="csr")
+    trees = SourceTrees(directory=tmp_path)
+    assert trees.distance(KEVIN_BACON, EMMA_WATSON) is None
+
+    # A new first person shifts every index, and Emma Watson joins Apollo 13
+    people = (directory / "people.csv").read_text().split("\n", 1)
+    (directory / "people.csv").write_text(f"{people[0]}\n1,\"Somebody\",1970\n{people[1]}")
+    with open(directory / "stars.csv", "a") as f:
+        f.write(f"{EMMA_WATSON},112384\n")
+    degrees.load_data(directory, backend="csr")
+
+    reloaded = SourceTrees(directory=tmp_path)
+    assert reloaded.distance(KEVIN_BACON, EMMA_WATSON) == 1
+    assert reloaded.shortest_path(KEVIN_BACON, TOM_CRUISE) == degrees.shortest_path(KEVIN_BACON, TOM_CRUISE)
+    assert reloaded.stale == 1
+
+    # The rebuilt tree was persisted for the new data
+    again = SourceTrees(directory=tmp_path)
+    assert again.distance(KEVIN_BACON, EMMA_WATSON) == 1
+    assert again.stale == 0
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,75 @@
+import pytest
+import degrees
+from landmarks import Landmarks, select_landmarks
+from distances import BFSTree, current_graph
+
+KEVIN_BACON = "102"
+TOM_CRUISE = "129"
+CARY_ELWES = "144"
+
+
+@pytest.fixture(autouse=True)
+def small():
+    degrees.load_data("small", backend="csr")
+
+
+def test_select_landmarks():
+    graph = current_graph()
+    landmarks = select_landmarks(graph, 3)
+    assert len(landmarks) == len(set(landmarks)) == 3
+    assert select_landmarks(graph, 0) == []
+
+
+def test_landmark_trees_built_once(monkeypatch):
+    sources = []
+    build = BFSTree.build
+
+    def counted(graph, source, *args):
+        sources.append(source)
+        return build(graph, source, *args)
+
+    monkeypatch.setattr(BFSTree, "build", staticmethod(counted))
+    alt = Landmarks(count=3)
+    assert sources == alt.landmarks
+
+
+def test_heuristic_is_admissible():
+    alt = Landmarks(count=2)
+    graph = alt.graph
+    for source in degrees.people:
+        for target in degrees.people:
+            path = degrees.shortest_path(source, target)
+            bound = alt.heuristic(graph.person_index[source], graph.person_index[target])
+            if path is not None:
+                assert bound <= len(path)
+
+
+def test_shortest_path():
+    alt = Landmarks(count=2)
+    for source in degrees.people:
+        for target in degrees.people:
+            expected = degrees.shortest_path(source, target)
+            path = alt.shortest_path(source, target)
+            if expected is None:
+                assert path is None
+            else:
+                assert len(path) == len(expected)
+                if path:
+                    assert path[-1][1] == target
+
+
+def test_expands_fewer_nodes():
+    alt = Landmarks(count=4)
+    bfs_total, alt_total = 0, 0
+    for source in degrees.people:
+        for target in degrees.people:
+            bfs_stats, alt_stats = {}, {}
+            degrees.shortest_path(source, target, stats=bfs_stats)
+            alt.shortest_path(source, target, stats=alt_stats)
+            bfs_total += bfs_stats["expanded"]
+            alt_total += alt_stats["expanded"]
+    assert alt_total < bfs_total
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,28 @@
+import pytest
+from nameindex import NameIndex, trigrams
+
+NAMES = ["kevin bacon", "kevin costner", "kevin spacey", "tom cruise", "tom hanks", "cary elwes"]
+
+
+def test_trigrams():
+    assert trigrams("tom") == ["  t", " to", "tom", "om "]
+
+
+def test_prefix():
+    index = NameIndex(NAMES)
+    assert index.prefix("kevin") == ["kevin bacon", "kevin costner", "kevin spacey"]
+    assert index.prefix("Kevin", limit=1) == ["kevin bacon"]
+    assert index.prefix("tom h") == ["tom hanks"]
+    assert index.prefix("zz") == []
+
+
+def test_fuzzy():
+    index = NameIndex(NAMES)
+    assert index.fuzzy("Kevin Bacn")[0][0] == "kevin bacon"
+    assert index.fuzzy("tom hankss", limit=1)[0][0] == "tom hanks"
+    assert index.fuzzy("cary elwes")[0] == ("cary elwes", 1.0)
+    assert index.fuzzy("xyz") == []
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,84 @@
+import io
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+import pytest
+import degrees
+from service import answer, make_pool, make_server, read_pairs, run_batch
+
+
+@pytest.fixture(scope="module")
+def pool():
+    degrees.load_data("small", backend="csr")
+    with make_pool("small", "csr", 2) as pool:
+        yield pool
+
+
+def has_name_index(_):
+    return degrees.name_index is not None
+
+
+def test_pool_shares_name_index(pool):
+    assert all(pool.map(has_name_index, range(4)))
+
+
+def test_answer():
+    degrees.load_data("small")
+    result = answer("Kevin Bacon", "Tom Hanks")
+    assert result["degrees"] == 1
+    assert result["path"] == [{
+        "movie_id": "112384", "title": "Apollo 13",
+        "person_id": "158", "name": "Tom Hanks",
+    }]
+    assert answer("Kevin Bacon", "Emma Watson")["path"] is None
+    assert "error" in answer("Kevin Bacon", "Nobody")
+
+
+def test_answer_fuzzy_names():
+    degrees.load_data("small")
+    result = answer("kevin bacn", "Tom Hnaks")
+    assert result["resolved"] == {"source": "Kevin Bacon", "target": "Tom Hanks"}
+    assert result["degrees"] == 1
+
+
+def test_read_pairs():
+    pairs = list(read_pairs(io.StringIO("Kevin Bacon, Tom Hanks\n\n\"Cruise, Tom\",Emma Watson\n")))
+    assert pairs == [("Kevin Bacon", "Tom Hanks"), ("Cruise, Tom", "Emma Watson")]
+    with pytest.raises(ValueError):
+        list(read_pairs(io.StringIO("Kevin Bacon\n")))
+
+
+def test_run_batch(pool):
+    infile = io.StringIO("Kevin Bacon,Tom Hanks\nCary Elwes,Tom Cruise\nKevin Bacon,Emma Watson\n")
+    outfile = io.StringIO()
+    assert run_batch(pool, infile, outfile) == 3
+    results = [json.loads(line) for line in outfile.getvalue().splitlines()]
+    assert [r["degrees"] for r in results] == [1, 4, None]
+    assert results[1]["source"] == "Cary Elwes"
+
+
+def test_server(pool):
+    server = make_server(pool, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urlopen(f"{url}/path?source=Kevin+Bacon&target=Tom+Hanks") as response:
+            assert json.load(response)["degrees"] == 1
+        with pytest.raises(HTTPError) as e:
+            urlopen(f"{url}/path?source=Kevin+Bacon&target=Nobody")
+        assert e.value.code == 404
+        with urlopen(f"{url}/complete?prefix=tom") as response:
+            assert json.load(response)["names"] == ["Tom Cruise", "Tom Hanks"]
+        with pytest.raises(HTTPError) as e:
+            urlopen(f"{url}/other")
+        assert e.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,53 @@
+import pytest
+from util import Node, StackFrontier, QueueFrontier, PriorityFrontier
+
+
+def test_stack_frontier():
+    frontier = StackFrontier()
+    frontier.add(Node(state="a", parent=None, action=None))
+    frontier.add(Node(state="b", parent=None, action=None))
+    frontier.add(Node(state="b", parent=None, action=None))
+    assert frontier.contains_state("a")
+    assert frontier.remove().state == "b"
+    # One "b" node is still waiting in the frontier
+    assert frontier.contains_state("b")
+    assert frontier.remove().state == "b"
+    assert not frontier.contains_state("b")
+    assert frontier.remove().state == "a"
+    assert frontier.empty()
+    assert not frontier.contains_state("a")
+    with pytest.raises(Exception):
+        frontier.remove()
+
+
+def test_queue_frontier():
+    frontier = QueueFrontier()
+    for state in ["a", "b", "c"]:
+        frontier.add(Node(state=state, parent=None, action=None))
+    assert frontier.remove().state == "a"
+    assert not frontier.contains_state("a")
+    assert frontier.contains_state("c")
+    assert frontier.remove().state == "b"
+    assert frontier.remove().state == "c"
+    assert frontier.empty()
+    with pytest.raises(Exception):
+        frontier.remove()
+
+
+def test_priority_frontier():
+    frontier = PriorityFrontier()
+    frontier.add(Node(state="a", parent=None, action=None), priority=3)
+    frontier.add(Node(state="b", parent=None, action=None), priority=1)
+    frontier.add(Node(state="c", parent=None, action=None), priority=1)
+    assert frontier.contains_state("a")
+    assert frontier.remove().state == "b"
+    assert frontier.remove().state == "c"
+    assert not frontier.contains_state("c")
+    assert frontier.remove().state == "a"
+    assert frontier.empty()
+    with pytest.raises(Exception):
+        frontier.remove()
+
+
+if __name__ == "__main__":
+    pytest.main()
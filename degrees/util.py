@@ -1,3 +1,4 @@
+import heapq
 from collections import deque
 
 
@@ -11,12 +12,15 @@ class Node():
 class StackFrontier():
     def __init__(self):
         self.frontier = []
+        # Maps each state in the frontier to how many nodes hold it
+        self.states = {}
 
     def add(self, node):
         self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -25,14 +29,22 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._forget(node)
             return node
 
+    def _forget(self, node):
+        count = self.states[node.state] - 1
+        if count:
+            self.states[node.state] = count
+        else:
+            del self.states[node.state]
+
 
 class QueueFrontier(StackFrontier):
 
     def __init__(self):
+        super().__init__()
         self.frontier = deque()
 
     def remove(self):
@@ -40,4 +52,26 @@ class QueueFrontier(StackFrontier):
             raise Exception("empty frontier")
         else:
             node = self.frontier.popleft()
+            self._forget(node)
+            return node
+
+
+class PriorityFrontier(StackFrontier):
+
+    def __init__(self):
+        super().__init__()
+        # Breaks ties between equal priorities in insertion order
+        self.counter = 0
+
+    def add(self, node, priority=0):
+        heapq.heappush(self.frontier, (priority, self.counter, node))
+        self.counter += 1
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            _, _, node = heapq.heappop(self.frontier)
+            self._forget(node)
             return node
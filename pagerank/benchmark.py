@@ -0,0 +1,439 @@
+"""
+Benchmarks for the PageRank implementations.
+
+Usage: python benchmark.py [size ...] [--dangling-ratio RATIO]
+                           [--record PATH] [--baseline PATH]
+
+`--record` appends the ranking suite results to a JSON lines file, and
+`--baseline` compares them with results recorded by an earlier run.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from linkgraph import LinkGraph
+from matrix import (
+    METHODS, TransitionMatrix, power_iteration, solve,
+    sparse_pagerank, update_pagerank,
+    personalized_power_iteration, teleport_matrix,
+)
+from montecarlo import parallel_sample_pagerank, vectorized_sample_pagerank
+from outofcore import outofcore_pagerank
+from pagerank import DAMPING, crawl, iterate_pagerank, sample_pagerank, transition_model
+
+CORPORA = ("corpus0", "corpus1", "corpus2")
+SIZES = (1000, 100000, 1000000)
+
+# Sizes above this are too slow for the pure Python implementation
+PURE_PYTHON_LIMIT = 2000
+
+# Sizes above this write too many files to crawl
+CRAWL_LIMIT = 100000
+
+# Pages whose transition model is timed, and samples taken, per size
+MODELS = 1000
+SUITE_SAMPLES = 100000
+
+
+def synthetic_graph(n, average_links=8, dangling_ratio=0.1, exponent=1.0, seed=0):
+    """
+    Returns (sources, targets) arrays of a random scale-free link graph
+    on `n` pages, without self links or repeated links.
+
+    Roughly `dangling_ratio` of the pages have no links. The others link
+    to pages drawn with probability proportional to rank ** -exponent,
+    so a few pages collect most of the links, like on the web.
+    """
+    rng = np.random.default_rng(seed)
+    linking = np.flatnonzero(rng.random(n) >= dangling_ratio)
+    out_degree = rng.geometric(1 / average_links, size=len(linking))
+    sources = np.repeat(linking, out_degree)
+
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -exponent
+    # Shuffle which pages are popular so popularity is not tied to index
+    popularity = rng.permutation(n)
+    targets = popularity[rng.choice(n, size=len(sources), p=weights / weights.sum())]
+
+    keep = sources != targets
+    links = np.unique(sources[keep] * n + targets[keep])
+    return links // n, links % n
+
+
+def synthetic_corpus(n, **kwargs):
+    """
+    Returns a random scale-free corpus in the format returned by `crawl`.
+    """
+    sources, targets = synthetic_graph(n, **kwargs)
+    corpus = {f"{i}.html": set() for i in range(n)}
+    for source, target in zip(sources.tolist(), targets.tolist()):
+        corpus[f"{source}.html"].add(f"{target}.html")
+    return corpus
+
+
+def write_corpus(directory, corpus):
+    """
+    Writes `corpus` to `directory` as one HTML page per page,
+    in the format `crawl` reads.
+    """
+    for page, links in corpus.items():
+        anchors = "".join(f'<a href="{link}">{link}</a>\n' for link in sorted(links))
+        with open(os.path.join(directory, page), "w") as f:
+            f.write(f"<!DOCTYPE html>\n<html>\n<body>\n<h1>{page}</h1>\n{anchors}</body>\n</html>\n")
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns (result, seconds) of calling `function`.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def traced(function, *args, **kwargs):
+    """
+    Returns (result, seconds, peak) of calling `function`, where `peak`
+    is the most memory in bytes it had allocated at once. The function
+    is called twice, since tracing allocations slows it down: once
+    timed, and once traced.
+    """
+    _, seconds = timed(function, *args, **kwargs)
+    tracemalloc.start()
+    try:
+        result = function(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def compare_corpus(name, corpus):
+    """
+    Times the pure Python and sparse engines on one corpus.
+    """
+    expected, pure_seconds = timed(iterate_pagerank, corpus, DAMPING)
+    ranks, sparse_seconds = timed(sparse_pagerank, corpus, DAMPING)
+    difference = max(abs(expected[page] - ranks[page]) for page in corpus)
+    print(
+        f"  {name:>12}: {len(corpus):>8} pages, python {pure_seconds:.4f}s, "
+        f"sparse {sparse_seconds:.4f}s ({pure_seconds / sparse_seconds:.1f}x), "
+        f"max difference {difference:.5f}"
+    )
+
+
+def time_sparse(n, dangling_ratio=0.1):
+    """
+    Times building and solving the sparse engine on a synthetic graph.
+    """
+    (sources, targets), generate_seconds = timed(synthetic_graph, n, dangling_ratio=dangling_ratio)
+    pages = [f"{i}.html" for i in range(n)]
+    transitions, build_seconds = timed(TransitionMatrix.from_edges, pages, sources, targets)
+    (_, iterations), solve_seconds = timed(power_iteration, transitions, DAMPING)
+    print(
+        f"  {n:>12}: {len(sources):>10} links, generated in {generate_seconds:.2f}s, "
+        f"built in {build_seconds:.2f}s, solved in {solve_seconds:.2f}s "
+        f"({iterations} iterations)"
+    )
+
+
+def time_sampling(n, samples, dangling_ratio=0.1):
+    """
+    Times `sample_pagerank` on a synthetic corpus.
+    """
+    corpus = synthetic_corpus(n, dangling_ratio=dangling_ratio)
+    _, seconds = timed(sample_pagerank, corpus, DAMPING, samples, seed=0)
+    print(f"  {n:>12}: {samples} samples in {seconds:.2f}s ({samples / seconds:,.0f} steps/s)")
+
+
+def time_parallel_sampling(n, samples, dangling_ratio=0.1):
+    """
+    Times the multi-walker samplers on a synthetic corpus, with
+    process pools of increasing size, and reports the widest
+    confidence interval.
+    """
+    corpus = synthetic_corpus(n, dangling_ratio=dangling_ratio)
+    processes = 1
+    baseline = None
+    while processes <= (os.cpu_count() or 1):
+        (_, intervals), seconds = timed(
+            parallel_sample_pagerank, corpus, DAMPING, samples, processes=processes
+        )
+        baseline = baseline or seconds
+        width = max(high - low for low, high in intervals.values())
+        print(
+            f"  {processes:>3} processes: {samples} samples in {seconds:.2f}s "
+            f"({baseline / seconds:.1f}x), widest interval {width:.5f}"
+        )
+        processes *= 2
+
+    (_, intervals), seconds = timed(vectorized_sample_pagerank, corpus, DAMPING, samples)
+    width = max(high - low for low, high in intervals.values())
+    print(
+        f"   vectorized: {samples} samples in {seconds:.2f}s "
+        f"({baseline / seconds:.1f}x), widest interval {width:.5f}"
+    )
+
+
+def time_update(n, changes=10, seed=0, dangling_ratio=0.1):
+    """
+    Times a warm-started update after `changes` random link additions
+    and removals against solving the changed graph from scratch.
+    """
+    corpus = synthetic_corpus(n, dangling_ratio=dangling_ratio)
+    ranks = sparse_pagerank(corpus, DAMPING)
+
+    rng = np.random.default_rng(seed)
+    pages = list(corpus)
+    linking = [page for page in pages if corpus[page]]
+    removed = [(page, next(iter(corpus[page]))) for page in rng.choice(linking, changes, replace=False)]
+    added = [
+        (pages[i], pages[j])
+        for i, j in rng.integers(n, size=(changes, 2)) if i != j
+    ]
+
+    (_, warm_iterations), warm_seconds = timed(
+        update_pagerank, corpus, ranks, DAMPING, added=added, removed=removed
+    )
+    (_, cold_iterations), cold_seconds = timed(
+        lambda: power_iteration(TransitionMatrix.from_corpus(corpus), DAMPING)
+    )
+    print(
+        f"  {n:>12}: warm {warm_iterations} iterations in {warm_seconds:.2f}s, "
+        f"cold {cold_iterations} iterations in {cold_seconds:.2f}s"
+    )
+
+
+def compare_solvers(n, tolerance=1e-10, dangling_ratio=0.1):
+    """
+    Reports iterations, time and final error of every solver
+    on a synthetic graph.
+    """
+    sources, targets = synthetic_graph(n, dangling_ratio=dangling_ratio)
+    transitions = TransitionMatrix.from_edges([f"{i}.html" for i in range(n)], sources, targets)
+    reference, _ = power_iteration(transitions, DAMPING, tolerance=1e-14)
+    for method in METHODS:
+        (ranks, residuals), seconds = timed(solve, transitions, DAMPING, method=method, tolerance=tolerance)
+        error = np.abs(ranks - reference).sum()
+        print(
+            f"  {n:>12} {method:>12}: {len(residuals):>4} iterations in {seconds:.3f}s, "
+            f"L1 error {error:.2e}"
+        )
+
+
+def time_personalized(n, count=64, seed=0, dangling_ratio=0.1):
+    """
+    Times `count` personalized rankings solved in one batch
+    against solving them one at a time.
+    """
+    sources, targets = synthetic_graph(n, dangling_ratio=dangling_ratio)
+    pages = [f"{i}.html" for i in range(n)]
+    transitions = TransitionMatrix.from_edges(pages, sources, targets)
+    rng = np.random.default_rng(seed)
+    personalizations = [
+        [pages[i] for i in rng.choice(n, size=10, replace=False)]
+        for _ in range(count)
+    ]
+    teleport = teleport_matrix(transitions, personalizations)
+
+    _, batch_seconds = timed(personalized_power_iteration, transitions, DAMPING, teleport)
+    _, single_seconds = timed(lambda: [
+        personalized_power_iteration(transitions, DAMPING, teleport[:, [column]])
+        for column in range(count)
+    ])
+    print(
+        f"  {n:>12}: {count} personalizations batched in {batch_seconds:.2f}s, "
+        f"one at a time in {single_seconds:.2f}s ({single_seconds / batch_seconds:.1f}x)"
+    )
+
+
+def time_outofcore(n, budgets=(16 << 20, 64 << 20), dangling_ratio=0.1):
+    """
+    Times out-of-core ranking of a synthetic graph file
+    under each memory budget in `budgets`.
+    """
+    sources, targets = synthetic_graph(n, dangling_ratio=dangling_ratio)
+    offsets = np.searchsorted(sources, np.arange(n + 1)).astype(np.int64)
+    graph = LinkGraph([f"{i}.html" for i in range(n)], offsets, targets.astype(np.int32))
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.graph")
+        graph.save(path)
+        del graph, sources, targets, offsets
+        for budget in budgets:
+            try:
+                _, stats = outofcore_pagerank(path, DAMPING, memory_budget=budget)
+            except ValueError:
+                print(f"  {n:>12}: budget of {budget >> 20} MiB too small")
+                continue
+            line = (
+                f"  {n:>12}: budget {budget >> 20} MiB, {stats['blocks']} blocks, "
+                f"{stats['iterations']} iterations in {stats['seconds']:.2f}s, "
+                f"planned {stats['planned_bytes'] >> 20} MiB"
+            )
+            if stats["peak_rss"] is not None:
+                line += (
+                    f", RSS {stats['start_rss'] >> 20} MiB at start, "
+                    f"peak {stats['peak_rss'] >> 20} MiB"
+                )
+            print(line)
+
+
+def benchmark_ranking(n, dangling_ratio=0.1):
+    """
+    Returns one record per ranking function timed on a synthetic
+    corpus of `n` pages: `crawl`, `transition_model`,
+    `sample_pagerank` and `iterate_pagerank`. Each record gives the
+    seconds taken, the throughput in `unit`s per second, and the peak
+    memory allocated. Functions too slow for `n` are left out.
+    """
+    corpus = synthetic_corpus(n, dangling_ratio=dangling_ratio)
+    links = sum(len(targets) for targets in corpus.values())
+    records = []
+
+    def record(function, seconds, peak, count, unit):
+        records.append({
+            "function": function,
+            "pages": n,
+            "links": links,
+            "dangling_ratio": dangling_ratio,
+            "seconds": seconds,
+            "throughput": count / seconds,
+            "unit": unit,
+            "peak_memory": peak,
+        })
+
+    if n <= CRAWL_LIMIT:
+        with tempfile.TemporaryDirectory() as directory:
+            write_corpus(directory, corpus)
+            crawled, seconds, peak = traced(crawl, directory)
+            assert crawled == corpus
+            record("crawl", seconds, peak, n, "pages")
+
+    pages = list(corpus)[:MODELS]
+    _, seconds, peak = traced(model_pages, corpus, pages)
+    record("transition_model", seconds, peak, len(pages), "models")
+
+    _, seconds, peak = traced(sample_pagerank, corpus, DAMPING, SUITE_SAMPLES, seed=0)
+    record("sample_pagerank", seconds, peak, SUITE_SAMPLES, "samples")
+
+    if n <= PURE_PYTHON_LIMIT:
+        _, seconds, peak = traced(iterate_pagerank, corpus, DAMPING)
+        record("iterate_pagerank", seconds, peak, n, "pages")
+
+    return records
+
+
+def model_pages(corpus, pages):
+    """
+    Builds the transition model of every page in `pages`, one at a time.
+    """
+    for page in pages:
+        transition_model(corpus, page, DAMPING)
+
+
+def report_record(record, baseline=None):
+    """
+    Prints one ranking suite record, with its speedup over the
+    matching record of `baseline` if there is one.
+    """
+    line = (
+        f"  {record['pages']:>12} {record['function']:>17}: {record['seconds']:.3f}s, "
+        f"{record['throughput']:,.0f} {record['unit']}/s, "
+        f"peak {record['peak_memory'] / (1 << 20):.1f} MiB"
+    )
+    if baseline is not None:
+        line += f", {record['throughput'] / baseline['throughput']:.2f}x baseline"
+    print(line)
+
+
+def load_records(path):
+    """
+    Returns the last recorded ranking suite record in the JSON lines
+    file at `path` for every (function, pages, dangling ratio).
+    """
+    records = {}
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                records[record_key(record)] = record
+    return records
+
+
+def record_key(record):
+    """
+    Returns what identifies a ranking suite measurement.
+    """
+    return record["function"], record["pages"], record["dangling_ratio"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the PageRank implementations.")
+    parser.add_argument("sizes", nargs="*", type=int, default=SIZES,
+                        help="numbers of pages of the synthetic corpora")
+    parser.add_argument("--dangling-ratio", type=float, default=0.1,
+                        help="share of pages without links in every synthetic suite")
+    parser.add_argument("--record", help="append ranking suite results to this JSON lines file")
+    parser.add_argument("--baseline", help="compare ranking suite results with this JSON lines file")
+    args = parser.parse_args()
+    sizes = args.sizes
+    ratio = args.dangling_ratio
+    baseline = load_records(args.baseline) if args.baseline else {}
+
+    print("Ranking functions on synthetic corpora")
+    for n in sizes:
+        records = benchmark_ranking(n, ratio)
+        for record in records:
+            report_record(record, baseline.get(record_key(record)))
+        if args.record:
+            with open(args.record, "a") as f:
+                for record in records:
+                    f.write(json.dumps(record) + "\n")
+
+    print("Corpora")
+    for name in CORPORA:
+        compare_corpus(name, crawl(name))
+
+    print("Synthetic corpora")
+    for n in sizes:
+        if n <= PURE_PYTHON_LIMIT:
+            compare_corpus("synthetic", synthetic_corpus(n, dangling_ratio=ratio))
+
+    print("Sampling on synthetic corpora")
+    for n in sizes:
+        if n <= PURE_PYTHON_LIMIT:
+            time_sampling(n, 1000000, dangling_ratio=ratio)
+
+    print("Parallel sampling on synthetic corpora")
+    for n in sizes:
+        if n <= PURE_PYTHON_LIMIT:
+            time_parallel_sampling(n, 4000000, dangling_ratio=ratio)
+
+    print("Sparse engine on synthetic graphs")
+    for n in sizes:
+        time_sparse(n, dangling_ratio=ratio)
+
+    print("Solvers on synthetic graphs")
+    for n in sizes:
+        compare_solvers(n, dangling_ratio=ratio)
+
+    print("Personalized PageRank on synthetic graphs")
+    for n in sizes:
+        time_personalized(n, dangling_ratio=ratio)
+
+    print("Incremental updates on synthetic corpora")
+    for n in sizes:
+        time_update(n, dangling_ratio=ratio)
+
+    print("Out-of-core PageRank on synthetic graph files")
+    for n in sizes:
+        time_outofcore(n, dangling_ratio=ratio)
+
+
+if __name__ == "__main__":
+    main()
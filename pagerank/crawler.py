@@ -0,0 +1,124 @@
+"""
+Concurrent, streaming crawl of a directory of HTML pages.
+
+Files are read on a thread pool in fixed-size chunks, and links are
+extracted chunk by chunk, so no page is ever held in memory whole. The
+link graph can be written to disk page by page as an edge list, which
+lets huge directories be indexed without keeping the corpus in memory.
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Bytes read from a page at a time
+CHUNK_SIZE = 1 << 16
+
+# Longest tag kept whole across chunks; longer anchors are missed
+MAX_TAG = 1 << 13
+
+# Threads reading pages, and pages in flight per thread
+WORKERS = 8
+QUEUE_DEPTH = 4
+
+
+def list_pages(directory):
+    """
+    Returns the sorted names of the HTML pages in `directory`.
+    """
+    return sorted(
+        filename for filename in os.listdir(directory)
+        if filename.endswith(".html")
+    )
+
+
+def extract_links(path, chunk_size=CHUNK_SIZE):
+    """
+    Returns the set of link targets in the HTML file at `path`,
+    reading it `chunk_size` characters at a time.
+
+    A link split across two chunks is kept whole by carrying the text
+    from the last "<" after the last complete match over to the next
+    chunk. At most `MAX_TAG` characters are carried, so an unclosed tag
+    cannot make the buffer grow with the page.
+    """
+    links = set()
+    carry = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            buffer = carry + chunk
+            end = 0
+            for match in LINK.finditer(buffer):
+                links.add(match.group(1))
+                end = match.end()
+            if not chunk:
+                return links
+            start = buffer.rfind("<")
+            carry = buffer[start:] if start >= end and len(buffer) - start <= MAX_TAG else ""
+
+
+def iter_links(directory, pages=None, workers=WORKERS):
+    """
+    Yields (page, links) for each page in `directory`, in page order,
+    with the files read and parsed on `workers` threads. Only a few
+    pages per thread are in flight at once.
+    """
+    if pages is None:
+        pages = list_pages(directory)
+    pending = iter(pages)
+    with ThreadPoolExecutor(workers) as executor:
+        while True:
+            batch = list(islice(pending, workers * QUEUE_DEPTH))
+            if not batch:
+                return
+            paths = [os.path.join(directory, page) for page in batch]
+            yield from zip(batch, executor.map(extract_links, paths))
+
+
+def iter_edges(directory, workers=WORKERS):
+    """
+    Yields (page, target) for every link between two different pages
+    of `directory`, and (page, None) for every page without such links.
+    """
+    pages = list_pages(directory)
+    known = set(pages)
+    for page, links in iter_links(directory, pages, workers):
+        targets = sorted(link for link in links if link in known and link != page)
+        if not targets:
+            yield page, None
+        for target in targets:
+            yield page, target
+
+
+def write_edges(directory, path, workers=WORKERS):
+    """
+    Crawls `directory` and writes its link graph to `path`, one
+    "page<TAB>target" line per link and "page<TAB>" for pages
+    without links. Returns the number of links written.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for page, target in iter_edges(directory, workers):
+            f.write(f"{page}\t{target or ''}\n")
+            if target is not None:
+                count += 1
+    return count
+
+
+def read_edges(path):
+    """
+    Returns the corpus dictionary stored in an edge list
+    written by `write_edges`.
+    """
+    corpus = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            page, target = line.rstrip("\n").split("\t")
+            links = corpus.setdefault(page, set())
+            if target:
+                links.add(target)
+    return corpus
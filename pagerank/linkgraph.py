@@ -0,0 +1,227 @@
+"""
+Compact binary link graph for a crawled corpus.
+
+A graph file starts with an 8 byte magic, an 8 byte header length and a
+JSON header giving the position of each section. Sections are 8 byte
+aligned: the page names as a NUL separated UTF-8 string table, then the
+CSR edge arrays, where the links of page `i` are
+`targets[offsets[i]:offsets[i + 1]]`. The arrays are used straight from
+a read-only memory map, so loading a graph does no HTML parsing at all.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b"PRGRAPH\x01"
+
+
+class LinkGraph(Mapping):
+    """
+    Read-only corpus backed by CSR arrays.
+
+    It behaves like the dictionary returned by `crawl`, mapping each
+    page to the set of pages it links to, so it can be passed wherever
+    a corpus is expected.
+    """
+
+    def __init__(self, pages, offsets, targets):
+        self.pages = pages
+        self.index = {page: i for i, page in enumerate(pages)}
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Builds a graph from the dictionary returned by `crawl`.
+        """
+        pages = list(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+        offsets = array("q", [0])
+        targets = array("i")
+        for page in pages:
+            targets.extend(sorted(index[link] for link in corpus[page]))
+            offsets.append(len(targets))
+        return cls(pages, offsets, targets)
+
+    def __getitem__(self, page):
+        return {self.pages[target] for target in self.links_of(self.index[page])}
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, page):
+        return page in self.index
+
+    def links_of(self, i):
+        """
+        Returns the page indices linked to by page index `i`.
+        """
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def link_lists(self):
+        """
+        Returns a list whose item `i` lists the page indices
+        linked to by page index `i`.
+        """
+        return [self.links_of(i).tolist() for i in range(len(self.pages))]
+
+    def save(self, path):
+        """
+        Writes the graph to `path`, under a temporary name first.
+        """
+        blobs = {
+            "pages": "\0".join(self.pages).encode("utf-8"),
+            "offsets": bytes(self.offsets),
+            "targets": bytes(self.targets),
+        }
+        write_sections(path, len(self.pages), {
+            name: (len(blob), [blob]) for name, blob in blobs.items()
+        })
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-maps a graph written by `save`.
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        count, sections = read_header(path)
+        view = memoryview(buffer)
+
+        def section(name):
+            position, size = sections[name]
+            return view[position:position + size]
+
+        pages = bytes(section("pages")).decode("utf-8").split("\0") if count else []
+        return cls(pages, section("offsets").cast("q"), section("targets").cast("i"))
+
+
+def read_header(path):
+    """
+    Returns (count, sections) for the graph file at `path`, where
+    `sections` maps each section name to its (position, size) in bytes
+    from the start of the file.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a link graph file: {path}")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+    if header["byteorder"] != sys.byteorder:
+        raise ValueError(f"Link graph was written on a {header['byteorder']}-endian machine: {path}")
+
+    start = _padded(len(MAGIC) + 8 + length)
+    sections = {
+        name: (start + position, size)
+        for name, (position, size) in header["sections"].items()
+    }
+    return header["count"], sections
+
+
+def write_sections(path, count, sections):
+    """
+    Writes a graph file of `count` pages to `path`, under a temporary
+    name first. `sections` maps each section name, in file order, to
+    its size in bytes and an iterable of byte strings making it up, so
+    large sections can be streamed from elsewhere.
+    """
+    table = {}
+    position = 0
+    for name, (size, _) in sections.items():
+        table[name] = [position, size]
+        position += _padded(size)
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "count": count,
+        "sections": table,
+    }).encode("utf-8")
+    start = _padded(len(MAGIC) + 8 + len(header))
+
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (start - f.tell()))
+        for size, chunks in sections.values():
+            for chunk in chunks:
+                f.write(chunk)
+            f.write(b"\0" * (_padded(size) - size))
+    os.replace(temporary, path)
+
+
+def convert_edges(edges_path, path, chunk_size=1 << 16):
+    """
+    Writes the graph of an edge list written by `crawler.write_edges`
+    to the graph file `path`, without building the corpus in memory.
+    Returns the number of pages.
+
+    The edge list is read twice: once for the page names, and once to
+    spool the link targets to a temporary file `chunk_size` links at a
+    time. Only the names and the offsets are kept in memory.
+    """
+    pages = []
+    with open(edges_path, encoding="utf-8") as f:
+        for line in f:
+            page = line[:line.index("\t")]
+            if not pages or pages[-1] != page:
+                pages.append(page)
+    index = {page: i for i, page in enumerate(pages)}
+
+    offsets = array("q", [0])
+    spool = f"{path}.{os.getpid()}.targets"
+    try:
+        with open(edges_path, encoding="utf-8") as f, open(spool, "wb") as out:
+            targets = array("i")
+            count = 0
+            for line in f:
+                page, target = line.rstrip("\n").split("\t")
+                if index[page] == len(offsets):
+                    offsets.append(count)
+                if target:
+                    targets.append(index[target])
+                    count += 1
+                    if len(targets) >= chunk_size:
+                        targets.tofile(out)
+                        targets = array("i")
+            targets.tofile(out)
+            offsets.append(count)
+
+        names = "\0".join(pages).encode("utf-8")
+        with open(spool, "rb") as targets:
+            write_sections(path, len(pages), {
+                "pages": (len(names), [names]),
+                "offsets": (len(offsets) * offsets.itemsize, [bytes(offsets)]),
+                "targets": (count * 4, iter(lambda: targets.read(chunk_size * 4), b"")),
+            })
+    finally:
+        if os.path.exists(spool):
+            os.remove(spool)
+    return len(pages)
+
+
+def is_graph_file(path):
+    """
+    Returns True if `path` is a file starting with the link graph magic.
+    """
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _padded(size):
+    """
+    Returns `size` rounded up to a multiple of 8.
+    """
+    return (size + 7) & ~7
+
@@ -0,0 +1,178 @@
+"""
+Parallel Monte Carlo PageRank.
+
+The sample budget is split across independent batches of walkers, each
+with its own seed derived from one master seed, so results are
+reproducible no matter how the batches are scheduled. Visit counts are
+merged into one estimate, and the spread between batches gives a
+confidence interval for every page.
+"""
+
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from pagerank import random_walk
+
+# Independent batches used to estimate the confidence intervals
+BATCHES = 32
+
+# Walkers stepped together by the vectorized sampler
+WALKERS = 10000
+
+# Weight left on the starting page after the default burn-in
+BURN_IN_ERROR = 1e-6
+
+# z-score of the two-sided 95% confidence interval
+Z = 1.96
+
+# Per-process state set by `init_worker`
+worker_links = None
+worker_damping = None
+
+
+def parallel_sample_pagerank(corpus, damping_factor, n, batches=BATCHES,
+                             processes=None, seed=0):
+    """
+    Return (ranks, intervals) estimated from `n` samples split across
+    `batches` random walks run on a pool of `processes` processes.
+
+    `ranks` maps each page to its estimated PageRank, and `intervals`
+    maps each page to the (low, high) bounds of its 95% confidence
+    interval.
+    """
+    if n < 1:
+        raise ValueError("Need at least one sample")
+    pages, links = corpus_links(corpus)
+    budgets = split_budget(n, batches)
+    seeds = batch_seeds(seed, batches)
+    with ProcessPoolExecutor(processes, initializer=init_worker,
+                             initargs=(links, damping_factor)) as executor:
+        counts = list(executor.map(walk_batch, budgets, seeds))
+    return estimate(pages, np.array(counts, dtype=np.int64))
+
+
+def vectorized_sample_pagerank(corpus, damping_factor, n, walkers=WALKERS,
+                               batches=BATCHES, seed=0, burn_in=None):
+    """
+    Return (ranks, intervals) like `parallel_sample_pagerank`, but
+    step `walkers` random walks at once with NumPy in one process.
+    Every walker takes `n // walkers` counted steps, the first
+    `n % walkers` walkers one more, so exactly `n` visits are counted.
+    Walker `w` belongs to batch `w % batches`. There are never more
+    walkers or batches than samples, so every walker takes at least one
+    step. Visits are counted per batch, so memory grows with `batches`
+    times the number of pages.
+
+    Walks are short when there are many walkers, so each walker first
+    takes `burn_in` uncounted steps to forget its uniform start. By
+    default that is enough steps for damping_factor ** burn_in to
+    fall below BURN_IN_ERROR.
+    """
+    if n < 1:
+        raise ValueError("Need at least one sample")
+    pages, links = corpus_links(corpus)
+    N = len(pages)
+    batches = min(batches, n)
+    walkers = max(batches, min(walkers, n))
+    steps, extra = divmod(n, walkers)
+    if burn_in is None:
+        burn_in = math.ceil(math.log(BURN_IN_ERROR) / math.log(damping_factor)) if 0 < damping_factor < 1 else 0
+    out_degree = np.array([len(targets) for targets in links], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(out_degree)))
+    targets = np.array([t for page_targets in links for t in page_targets], dtype=np.int64)
+
+    rng = np.random.default_rng(seed)
+    current = rng.integers(N, size=walkers)
+    cells = (np.arange(walkers) % batches) * N
+    counts = np.zeros(batches * N, dtype=np.int64)
+
+    # Count visits in blocks of steps to keep bincount calls few
+    block = max(1, 1000000 // walkers)
+    history = np.empty((block, walkers), dtype=np.int64)
+    for step in range(-burn_in, steps + 1):
+        if step == steps:
+            # The remaining samples go to the first walkers
+            counts += np.bincount((cells + current)[:extra], minlength=batches * N)
+            break
+        if step >= 0:
+            history[step % block] = cells + current
+            if step % block == block - 1 or step == steps - 1:
+                filled = step % block + 1
+                counts += np.bincount(history[:filled].ravel(), minlength=batches * N)
+
+        degree = out_degree[current]
+        follow = (rng.random(walkers) < damping_factor) & (degree > 0)
+        choice = (rng.random(walkers) * degree).astype(np.int64)
+        following = current[follow]
+        current = rng.integers(N, size=walkers)
+        current[follow] = targets[offsets[following] + choice[follow]]
+
+    return estimate(pages, counts.reshape(batches, N))
+
+
+def corpus_links(corpus):
+    """
+    Returns (pages, links) where `links[i]` lists
+    the page indices linked to by `pages[i]`.
+    """
+    pages = list(corpus)
+    index = {page: i for i, page in enumerate(pages)}
+    return pages, [[index[link] for link in corpus[page]] for page in pages]
+
+
+def split_budget(n, batches):
+    """
+    Returns `batches` sample counts that add up to `n`.
+    """
+    share, extra = divmod(n, batches)
+    return [share + (1 if i < extra else 0) for i in range(batches)]
+
+
+def batch_seeds(seed, batches):
+    """
+    Returns one independent integer seed per batch, derived from `seed`.
+    """
+    children = np.random.SeedSequence(seed).spawn(batches)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def init_worker(links, damping_factor):
+    """
+    Stores the corpus in a worker process once, instead of per batch.
+    """
+    global worker_links, worker_damping
+    worker_links = links
+    worker_damping = damping_factor
+
+
+def walk_batch(budget, seed):
+    """
+    Returns the visit counts of one seeded random walk of `budget` samples.
+    """
+    rng = random.Random(seed)
+    start = rng.randrange(len(worker_links))
+    return random_walk(worker_links, worker_damping, budget, start, rng)
+
+
+def estimate(pages, counts):
+    """
+    Return (ranks, intervals) from a batches x pages array of visit counts.
+    """
+    budgets = counts.sum(axis=1)
+    ranks = counts.sum(axis=0) / budgets.sum()
+    used = budgets > 0
+    if used.sum() > 1:
+        per_batch = counts[used] / budgets[used, None]
+        half_width = Z * per_batch.std(axis=0, ddof=1) / math.sqrt(used.sum())
+    else:
+        half_width = np.full(len(pages), math.inf)
+    return (
+        {page: float(rank) for page, rank in zip(pages, ranks)},
+        {
+            page: (float(rank - half), float(rank + half))
+            for page, rank, half in zip(pages, ranks, half_width)
+        },
+    )
@@ -0,0 +1,266 @@
+"""
+Out-of-core PageRank over a link graph file.
+
+Only the rank vectors live in memory. Every iteration streams the CSR
+edge arrays of a graph file written by `LinkGraph.save` or
+`convert_edges` from disk in blocks, each block covering a stripe of
+source pages and at most a fixed number of their links, and scatters
+the rank of those pages onto their targets:
+
+    PR' = (1 - d) / N + d * (M @ PR + sum(PR[dangling]) / N)
+
+Block sizes are derived from a memory budget, so the working set of a
+run is bounded however large the graph is.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from linkgraph import read_header
+from matrix import MAX_ITERATIONS, NORMS
+
+TOLERANCE = 0.001
+
+# Default bytes for rank vectors and edge blocks together
+MEMORY_BUDGET = 256 << 20
+
+# Bytes held per page for the whole run: the old and new ranks and the
+# dangling page mask. Links are scattered straight into the new ranks,
+# and the residual is computed in the buffer of the old ones, so no
+# other array as long as the graph is ever allocated.
+BYTES_PER_PAGE = 8 + 8 + 1
+
+# Bytes held while a block is processed, per link and per source page
+BYTES_PER_LINK = 4 + 8 + 8
+BYTES_PER_SOURCE = 8 * 5
+
+# Bytes held whatever the size of the graph: file and reduction
+# buffers, the block plan, and rounding every array up to whole pages
+FIXED_BYTES = 64 << 10
+
+# Smallest block worth reading
+MIN_BLOCK_BYTES = 1 << 20
+
+
+def outofcore_pagerank(path, damping_factor, memory_budget=MEMORY_BUDGET,
+                       tolerance=TOLERANCE, norm="linf",
+                       max_iterations=MAX_ITERATIONS, callback=None):
+    """
+    Returns (ranks, stats) for the graph file at `path`, by power
+    iteration that keeps at most about `memory_budget` bytes in use.
+
+    `ranks` maps each page to its PageRank. Iteration stops once the
+    change between two iterations, measured with `norm` ("l1" or
+    "linf"), is at most `tolerance`. If given,
+    `callback(iteration, residual)` is called after every iteration.
+
+    `stats` holds the number of iterations and blocks, the links and
+    source pages per block, the bytes the solver planned to use, and
+    the resident set size of the process in bytes at the start of the
+    run and at its peak during the iterations. Building the returned
+    dictionary comes after that, and is not counted in the budget.
+    """
+    if norm not in NORMS:
+        raise ValueError(f"Unknown norm: {norm}")
+    count, sections = read_header(path)
+    block_links, block_pages = block_sizes(count, memory_budget)
+    blocks = plan_blocks(path, sections, block_links, block_pages)
+
+    start_rss = reset_peak_rss()
+    started = time.perf_counter()
+    with open(path, "rb") as f:
+        dangling = dangling_pages(f, sections, count, block_pages)
+        ranks = np.full(count, 1 / count) if count else np.zeros(0)
+        spare = np.empty(count)
+        iterations = 0
+        for iterations in range(1, max_iterations + 1 if count else 1):
+            new_ranks = step(f, sections, blocks, ranks, dangling, damping_factor, out=spare)
+            new_ranks /= new_ranks.sum()
+            residual = residual_into(ranks, new_ranks, norm)
+            if callback is not None:
+                callback(iterations, residual)
+            # The old ranks now hold the residual, and are overwritten
+            # by the next step
+            spare, ranks = ranks, new_ranks
+            if residual <= tolerance:
+                break
+
+    stats = {
+        "iterations": iterations,
+        "blocks": len(blocks),
+        "block_links": block_links,
+        "block_pages": block_pages,
+        "planned_bytes": count * BYTES_PER_PAGE + FIXED_BYTES
+        + block_links * BYTES_PER_LINK + block_pages * BYTES_PER_SOURCE,
+        "seconds": time.perf_counter() - started,
+        "start_rss": start_rss,
+        "peak_rss": peak_rss(),
+    }
+    return dict(zip(page_names(path, sections, count), ranks.tolist())), stats
+
+
+def block_sizes(count, memory_budget):
+    """
+    Returns (links, pages) per block for a graph of `count` pages,
+    splitting what `memory_budget` leaves after the rank vectors and
+    fixed buffers evenly between link and source page buffers.
+    """
+    spare = memory_budget - count * BYTES_PER_PAGE - FIXED_BYTES
+    if spare < MIN_BLOCK_BYTES:
+        raise ValueError(
+            f"A memory budget of {memory_budget} bytes is too small for {count} pages, "
+            f"at least {count * BYTES_PER_PAGE + FIXED_BYTES + MIN_BLOCK_BYTES} bytes are needed"
+        )
+    return spare // 2 // BYTES_PER_LINK, spare // 2 // BYTES_PER_SOURCE
+
+
+def plan_blocks(path, sections, block_links, block_pages):
+    """
+    Returns the blocks of an iteration as (first page, end page, first
+    link, end link) tuples. A block ends after `block_pages` source
+    pages or `block_links` links, whichever comes first, so a page with
+    too many links is split across several blocks.
+    """
+    position, size = sections["offsets"]
+    offsets = np.memmap(path, dtype=np.int64, mode="r", offset=position, shape=size // 8)
+    pages = len(offsets) - 1
+    links = int(offsets[-1])
+
+    # Cut points as (page, link) cursors, merged in order
+    by_links = np.arange(0, links, block_links, dtype=np.int64)
+    by_pages = np.arange(0, pages, block_pages, dtype=np.int64)
+    cuts = sorted(
+        set(zip((np.searchsorted(offsets, by_links, side="right") - 1).tolist(), by_links.tolist()))
+        | set(zip(by_pages.tolist(), offsets[by_pages].tolist()))
+        | {(pages, links)}
+    )
+    del offsets
+    return [
+        (page, min(end_page + 1, pages), link, end_link)
+        for (page, link), (end_page, end_link) in zip(cuts, cuts[1:])
+    ]
+
+
+def dangling_pages(f, sections, count, block_pages):
+    """
+    Returns a boolean array marking the pages without links,
+    reading the offsets of `block_pages` pages at a time.
+    """
+    dangling = np.empty(count, dtype=bool)
+    for page in range(0, count, block_pages):
+        offsets = read_array(f, sections, "offsets", page, min(page + block_pages, count) + 1)
+        dangling[page:page + len(offsets) - 1] = np.diff(offsets) == 0
+    return dangling
+
+
+def step(f, sections, blocks, ranks, dangling, damping_factor, out=None):
+    """
+    Returns the ranks after one power iteration step, streaming every
+    block of links from `f`. They are written to `out` if given.
+    """
+    count = len(ranks)
+    new_ranks = np.zeros(count) if out is None else out
+    new_ranks.fill(0)
+    for block in blocks:
+        scatter(f, sections, block, ranks, new_ranks)
+    dangling_rank = ranks.sum(where=dangling)
+    new_ranks *= damping_factor
+    new_ranks += (1 - damping_factor) / count + damping_factor * dangling_rank / count
+    return new_ranks
+
+
+def scatter(f, sections, block, ranks, new_ranks):
+    """
+    Adds the rank that the source pages of `block` pass along its
+    links to `new_ranks`. The block's arrays are freed on return, so
+    only one block is held at a time.
+    """
+    page, end_page, link, end_link = block
+    offsets = read_array(f, sections, "offsets", page, end_page + 1)
+    starts = np.clip(offsets[:-1], link, end_link)
+    ends = np.clip(offsets[1:], link, end_link)
+    degree = np.diff(offsets)
+    np.maximum(degree, 1, out=degree)
+    shares = ranks[page:end_page] / degree
+    ends -= starts
+    targets = read_array(f, sections, "targets", link, end_link)
+    np.add.at(new_ranks, targets, np.repeat(shares, ends))
+
+
+def residual_into(ranks, new_ranks, norm):
+    """
+    Returns the L1 or L-infinity distance between two rank vectors,
+    overwriting `ranks` with the absolute changes rather than
+    allocating a vector for them.
+    """
+    np.subtract(ranks, new_ranks, out=ranks)
+    np.abs(ranks, out=ranks)
+    return float(ranks.sum() if norm == "l1" else ranks.max())
+
+
+def read_array(f, sections, name, start, end):
+    """
+    Returns items `start` to `end` of the offsets or targets section,
+    read from the open graph file `f`.
+    """
+    dtype = np.dtype(np.int64 if name == "offsets" else np.int32)
+    f.seek(sections[name][0] + start * dtype.itemsize)
+    return np.fromfile(f, dtype=dtype, count=end - start)
+
+
+def page_names(path, sections, count):
+    """
+    Returns the page names stored in the graph file at `path`.
+    """
+    position, size = sections["pages"]
+    with open(path, "rb") as f:
+        f.seek(position)
+        return f.read(size).decode("utf-8").split("\0") if count else []
+
+
+def reset_peak_rss():
+    """
+    Returns the resident set size of this process in bytes, and resets
+    its peak to that where the platform allows it (Linux), so that
+    `peak_rss` measures from here on.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+    return _proc_status("VmRSS") or peak_rss()
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes,
+    or None where that is not available.
+    """
+    peak = _proc_status("VmHWM")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _proc_status(field):
+    """
+    Returns a memory `field` of /proc/self/status in bytes,
+    or None where there is no such file.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
@@ -1,17 +1,27 @@
 import os
 import random
-import re
 import sys
 from collections import defaultdict
 
+from crawler import WORKERS, iter_links
+from linkgraph import LinkGraph, is_graph_file
+
 DAMPING = 0.85
 SAMPLES = 10000
+TOLERANCE = 0.001
+NORMS = ("l1", "linf")
+
+# How far the sum of the ranks may drift from 1 before renormalising
+DRIFT = 1e-12
 
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python pagerank.py corpus [output.graph]")
+    if is_graph_file(sys.argv[1]):
+        corpus = LinkGraph.load(sys.argv[1])
+    else:
+        corpus = crawl(sys.argv[1], save=sys.argv[2] if len(sys.argv) == 3 else None)
     ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
@@ -22,22 +32,21 @@ def main():
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, workers=WORKERS, save=None):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
+
+    Pages are read and parsed in chunks on `workers` threads. If `save`
+    is a path, the result is also written there as a binary link graph,
+    which `LinkGraph.load` reads back without parsing any HTML.
     """
     pages = dict()
 
     # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    for filename, links in iter_links(directory, workers=workers):
+        pages[filename] = links - {filename}
 
     # Only include links to other pages in the corpus
     for filename in pages:
@@ -46,6 +55,9 @@ def crawl(directory):
             if link in pages
         )
 
+    if save is not None:
+        LinkGraph.from_corpus(pages).save(save)
+
     return pages
 
 
@@ -75,7 +87,7 @@ def transition_model(corpus, page, damping_factor):
     return result
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, seed=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
@@ -83,44 +95,51 @@ def sample_pagerank(corpus, damping_factor, n):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    `seed` makes the walk reproducible.
     """
     pages = list(corpus.keys())
-    visited = {page: 0 for page in pages}
-    models = {}
+    if isinstance(corpus, LinkGraph):
+        # Use the stored page indices instead of page names
+        links = corpus.link_lists()
+    else:
+        index = {page: i for i, page in enumerate(pages)}
+        links = [[index[link] for link in corpus[page]] for page in pages]
+
+    rng = random.Random(seed)
+    visited = random_walk(links, damping_factor, n, rng.randrange(len(pages)), rng)
 
-    for page in pages:
-        models[page] = transition_model(corpus=corpus, page=page, damping_factor=damping_factor)
-    
-    # Get the first sample
-    next_sample = random.choice(pages)
-    visited[next_sample] += 1
-    count = n
-    while count - 1 > 0:
-        next_model = models[next_sample]
-        # Get next sample
-        next_sample = generate_next_sample(next_model)
-        count -= 1
-        # Record visited page
-        visited[next_sample] += 1
-    
     # Return estimated page rank
-    return {page : visited[page] / n for page in visited}
+    return {page: visited[i] / n for i, page in enumerate(pages)}
 
 
-def generate_next_sample(model):
+def random_walk(links, damping_factor, n, start, rng):
     """
-    Return the next sample base on the probability in the model
+    Return how many times each page is visited by a random walk of
+    `n` samples starting at page index `start`, where `links[i]` lists
+    the page indices linked to by page `i`.
+
+    Each step is O(1) and exact: the transition model is a mix of a
+    uniform jump to any page, taken with probability
+    `1 - damping_factor` or when the page has no links, and a
+    uniform choice among the page's links.
     """
-    pages = []
-    counts = []
-    for page, count in model.items():
-        pages.append(page)
-        counts.append(int(count * 1000))
-    
-    return random.sample(pages, counts=counts, k=1)[0]
-
-
-def iterate_pagerank(corpus, damping_factor):
+    N = len(links)
+    visited = [0] * N
+    current = start
+    random_number = rng.random
+    for _ in range(n):
+        visited[current] += 1
+        targets = links[current]
+        if targets and random_number() < damping_factor:
+            current = targets[int(random_number() * len(targets))]
+        else:
+            current = int(random_number() * N)
+    return visited
+
+
+def iterate_pagerank(corpus, damping_factor, tolerance=TOLERANCE, norm="linf",
+                     callback=None, memory_budget=None, solver=None):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
@@ -128,7 +147,41 @@ def iterate_pagerank(corpus, damping_factor):
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
+
+    Iteration stops once the change between two iterations, measured
+    with `norm` ("l1" or "linf"), is at most `tolerance`. If given,
+    `callback(iteration, residual)` is called after every iteration.
+
+    `corpus` may also be the path of a graph file, which is then ranked
+    out of core, streaming its links from disk in blocks so that at
+    most about `memory_budget` bytes are in use (see outofcore.py).
+
+    If `solver` is given, the ranking is computed by the sparse matrix
+    engine with that method instead ("power", "gauss-seidel", "aitken",
+    "quadratic" or "adaptive", see `matrix.solve`).
     """
+    if norm not in NORMS:
+        raise ValueError(f"Unknown norm: {norm}")
+    if isinstance(corpus, (str, os.PathLike)):
+        if solver not in (None, "power"):
+            raise ValueError(f"Graph files are only ranked by power iteration, not {solver}")
+        from outofcore import MEMORY_BUDGET, outofcore_pagerank
+        ranks, _ = outofcore_pagerank(
+            corpus, damping_factor, memory_budget or MEMORY_BUDGET,
+            tolerance, norm, callback=callback,
+        )
+        return ranks
+    if isinstance(corpus, LinkGraph):
+        # Look up every page's links once rather than in the inner loops
+        corpus = dict(corpus.items())
+    if solver is not None:
+        from matrix import TransitionMatrix, solve
+        transitions = TransitionMatrix.from_corpus(corpus)
+        ranks, _ = solve(
+            transitions, damping_factor, method=solver, tolerance=tolerance,
+            norm=norm, callback=callback,
+        )
+        return transitions.to_dict(ranks)
     pages = list(corpus.keys())
     N = len(pages)
     # Initial the same page rank for each page
@@ -142,8 +195,9 @@ def iterate_pagerank(corpus, damping_factor):
             if not targets or page in targets:
                 backlinks[page].add(source)
     
-    # Iterate the page rank algorithm until every page's page rank change less than 0.001
+    # Iterate the page rank algorithm until the page ranks change less than the tolerance
     converge = False
+    iteration = 0
     while not converge:
         new_pageranks = defaultdict(float)
         # Recalculate each page's page rank
@@ -156,12 +210,18 @@ def iterate_pagerank(corpus, damping_factor):
                 sigma += pageranks[link] / numLinks
             new_pageranks[page] += damping_factor * sigma
     
-        # Normalise the new pageranks
-        # norm_factor = sum(new_pageranks.values())
-        # new_pageranks = {page: (rank / norm_factor) for page, rank in new_pageranks.items()}
+        # Normalise the new pageranks once rounding errors start to add up
+        norm_factor = sum(new_pageranks.values())
+        if abs(norm_factor - 1) > DRIFT:
+            new_pageranks = {page: (rank / norm_factor) for page, rank in new_pageranks.items()}
 
         # Evaluate if the new_pageranks converge with previous pageranks
-        converge = all(abs(new_pageranks[page] - pageranks[page]) <= 0.001 for page in pages)
+        changes = [abs(new_pageranks[page] - pageranks[page]) for page in pages]
+        residual = sum(changes) if norm == "l1" else max(changes)
+        converge = residual <= tolerance
+        iteration += 1
+        if callback is not None:
+            callback(iteration, residual)
 
         # Assign new_pageranks to pageranks
         pageranks = new_pageranks
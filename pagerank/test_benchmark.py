@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+import pytest
+from benchmark import (
+    benchmark_ranking, load_records, record_key, synthetic_corpus,
+    synthetic_graph, write_corpus,
+)
+from pagerank import crawl
+
+
+def test_synthetic_graph():
+    sources, targets = synthetic_graph(1000, dangling_ratio=0.3, seed=1)
+    assert np.all(sources != targets)
+    links = set(zip(sources.tolist(), targets.tolist()))
+    assert len(links) == len(sources)
+    dangling = 1 - len(set(sources.tolist())) / 1000
+    assert dangling == pytest.approx(0.3, abs=0.05)
+
+    again = synthetic_graph(1000, dangling_ratio=0.3, seed=1)
+    assert np.array_equal(sources, again[0]) and np.array_equal(targets, again[1])
+
+
+def test_synthetic_graph_is_scale_free():
+    _, targets = synthetic_graph(10000, seed=0)
+    in_degree = np.sort(np.bincount(targets, minlength=10000))[::-1]
+    # The most linked pages collect far more links than the median page
+    assert in_degree[0] > 100 * max(1, in_degree[5000])
+
+
+def test_write_corpus(tmp_path):
+    corpus = synthetic_corpus(50, dangling_ratio=0.2)
+    write_corpus(tmp_path, corpus)
+    assert crawl(tmp_path) == corpus
+
+
+def test_benchmark_ranking(tmp_path):
+    records = benchmark_ranking(100, dangling_ratio=0.2)
+    assert [record["function"] for record in records] == [
+        "crawl", "transition_model", "sample_pagerank", "iterate_pagerank",
+    ]
+    for record in records:
+        assert record["pages"] == 100
+        assert record["throughput"] > 0
+        assert record["peak_memory"] > 0
+
+    path = tmp_path / "results.jsonl"
+    path.write_text("".join(json.dumps(record) + "\n" for record in records * 2))
+    loaded = load_records(path)
+    assert loaded == {record_key(record): record for record in records}
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,62 @@
+import pytest
+import crawler
+from crawler import MAX_TAG, extract_links, iter_edges, read_edges, write_edges
+from pagerank import crawl
+
+
+def test_extract_links_across_chunks(tmp_path):
+    page = tmp_path / "page.html"
+    page.write_text(
+        '<html><a href="1.html">one</a> text <a class="x" href="2.html">two</a>'
+        + " " * 50 + '<a   href="3.html">three</a></html>'
+    )
+    expected = {"1.html", "2.html", "3.html"}
+    for chunk_size in [1, 3, 7, 16, 1 << 16]:
+        assert extract_links(page, chunk_size=chunk_size) == expected
+
+
+def test_extract_links_bounded(tmp_path, monkeypatch):
+    page = tmp_path / "page.html"
+    # An unclosed tag followed by a long page without anchors
+    page.write_text("<p " + "x" * 1000000 + ' <a href="1.html">one</a>')
+
+    scanned = []
+
+    class Recording:
+        def finditer(self, buffer):
+            scanned.append(len(buffer))
+            return LINK.finditer(buffer)
+
+    LINK = crawler.LINK
+    monkeypatch.setattr(crawler, "LINK", Recording())
+    assert extract_links(page, chunk_size=1024) == {"1.html"}
+    assert max(scanned) <= 1024 + MAX_TAG
+
+
+def test_crawl():
+    corpus = crawl("corpus0", workers=2)
+    assert corpus == {
+        "1.html": {"2.html"},
+        "2.html": {"1.html", "3.html"},
+        "3.html": {"2.html", "4.html"},
+        "4.html": {"2.html"},
+    }
+
+
+def test_edges(tmp_path):
+    for directory in ["corpus0", "corpus1", "corpus2"]:
+        path = tmp_path / f"{directory}.tsv"
+        count = write_edges(directory, path)
+        corpus = crawl(directory)
+        assert count == sum(len(links) for links in corpus.values())
+        assert read_edges(path) == corpus
+
+
+def test_dangling_pages_in_edges(tmp_path):
+    (tmp_path / "a.html").write_text('<a href="b.html">b</a> <a href="a.html">self</a>')
+    (tmp_path / "b.html").write_text('<a href="missing.html">gone</a>')
+    assert list(iter_edges(tmp_path)) == [("a.html", "b.html"), ("b.html", None)]
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,50 @@
+import pytest
+from linkgraph import LinkGraph, is_graph_file
+from matrix import sparse_pagerank
+from pagerank import crawl, iterate_pagerank, sample_pagerank
+
+DAMPING = 0.85
+
+
+@pytest.mark.parametrize("directory", ["corpus0", "corpus1", "corpus2"])
+def test_save_and_load(tmp_path, directory):
+    path = tmp_path / "corpus.graph"
+    corpus = crawl(directory, save=path)
+    assert is_graph_file(path)
+    graph = LinkGraph.load(path)
+    assert len(graph) == len(corpus)
+    assert dict(graph) == corpus
+    assert "missing.html" not in graph
+
+
+def test_ranking_from_graph(tmp_path):
+    path = tmp_path / "corpus.graph"
+    corpus = crawl("corpus2", save=path)
+    graph = LinkGraph.load(path)
+
+    assert iterate_pagerank(graph, DAMPING) == iterate_pagerank(corpus, DAMPING)
+    sampled = sample_pagerank(graph, DAMPING, 100000, seed=0)
+    for page, rank in iterate_pagerank(corpus, DAMPING).items():
+        assert sampled[page] == pytest.approx(rank, abs=0.01)
+    expected = sparse_pagerank(corpus, DAMPING)
+    for page, rank in sparse_pagerank(graph, DAMPING).items():
+        assert rank == pytest.approx(expected[page], abs=1e-12)
+
+
+def test_empty_graph(tmp_path):
+    path = tmp_path / "empty.graph"
+    LinkGraph.from_corpus({}).save(path)
+    assert len(LinkGraph.load(path)) == 0
+
+
+def test_not_a_graph(tmp_path):
+    path = tmp_path / "page.html"
+    path.write_text("<html></html>")
+    assert not is_graph_file(path)
+    assert not is_graph_file(tmp_path)
+    with pytest.raises(ValueError):
+        LinkGraph.load(path)
+
+
+if __name__ == "__main__":
+    pytest.main()
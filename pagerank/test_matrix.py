@@ -0,0 +1,255 @@
+import numpy as np
+import pytest
+import matrix
+from benchmark import synthetic_graph
+from matrix import (
+    METHODS, AdaptiveStep, TransitionMatrix, power_iteration, solve, steady,
+    sparse_pagerank, update_pagerank, personalized_pagerank,
+)
+from pagerank import crawl, iterate_pagerank
+
+DAMPING = 0.85
+
+
+def dense_pagerank(corpus, damping_factor, teleport=None):
+    # Solve the PageRank linear system directly, treating
+    # pages without links as linking to every page
+    pages = list(corpus)
+    n = len(pages)
+    if teleport is None:
+        google = np.full((n, n), (1 - damping_factor) / n)
+    else:
+        jump = np.array([teleport.get(page, 0) for page in pages], dtype=np.float64)
+        google = np.tile((1 - damping_factor) * jump[:, None] / jump.sum(), (1, n))
+    for i, page in enumerate(pages):
+        links = corpus[page] or pages
+        for link in links:
+            google[pages.index(link), i] += damping_factor / len(links)
+    values, vectors = np.linalg.eig(google)
+    ranks = np.real(vectors[:, np.argmax(np.real(values))])
+    return dict(zip(pages, ranks / ranks.sum()))
+
+
+@pytest.mark.parametrize("directory", ["corpus0", "corpus1", "corpus2"])
+def test_sparse_pagerank(directory):
+    corpus = crawl(directory)
+    ranks = sparse_pagerank(corpus, damping_factor=DAMPING)
+    assert len(ranks) == len(corpus)
+    assert sum(ranks.values()) == pytest.approx(1)
+
+    expected = dense_pagerank(corpus, DAMPING)
+    reference = iterate_pagerank(corpus, damping_factor=DAMPING)
+    for page in corpus:
+        assert ranks[page] == pytest.approx(expected[page], abs=1e-8)
+        assert ranks[page] == pytest.approx(reference[page], abs=2e-3)
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_iterate_pagerank_solver(method):
+    corpus = crawl("corpus2")
+    expected = dense_pagerank(corpus, DAMPING)
+    ranks = iterate_pagerank(corpus, DAMPING, tolerance=1e-10, solver=method)
+    for page in corpus:
+        assert ranks[page] == pytest.approx(expected[page], abs=1e-8)
+    with pytest.raises(ValueError):
+        iterate_pagerank(corpus, DAMPING, solver="jacobi")
+
+
+def test_dangling_pages():
+    corpus = {"1.html": {"2.html"}, "2.html": {"1.html", "3.html"}, "3.html": set()}
+    transitions = TransitionMatrix.from_corpus(corpus)
+    assert transitions.dangling.tolist() == [False, False, True]
+    # Dangling pages are not materialised as N links
+    assert transitions.matrix.nnz == 3
+    ranks = sparse_pagerank(corpus, damping_factor=DAMPING)
+    expected = dense_pagerank(corpus, DAMPING)
+    for page in corpus:
+        assert ranks[page] == pytest.approx(expected[page], abs=1e-8)
+
+
+def test_synthetic_graph():
+    n = 300
+    sources, targets = synthetic_graph(n, dangling_ratio=0.2)
+    assert not np.any(sources == targets)
+    pages = [str(i) for i in range(n)]
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources, targets):
+        corpus[pages[source]].add(pages[target])
+
+    transitions = TransitionMatrix.from_edges(pages, sources, targets)
+    ranks, iterations = power_iteration(transitions, DAMPING)
+    assert iterations < 100
+    expected = dense_pagerank(corpus, DAMPING)
+    assert np.allclose(ranks, [expected[page] for page in pages], atol=1e-8)
+
+
+def test_update_pagerank():
+    corpus = crawl("corpus2")
+    ranks = sparse_pagerank(corpus, DAMPING)
+    added = [("ai.html", "c.html"), ("new.html", "python.html")]
+    removed = [("python.html", "ai.html")]
+    new_ranks, _ = update_pagerank(corpus, ranks, DAMPING, added=added, removed=removed)
+
+    assert "c.html" in corpus["ai.html"]
+    assert corpus["new.html"] == {"python.html"}
+    assert "ai.html" not in corpus["python.html"]
+    expected = dense_pagerank(corpus, DAMPING)
+    for page in corpus:
+        assert new_ranks[page] == pytest.approx(expected[page], abs=1e-8)
+
+
+def test_update_pagerank_warm_start_is_faster():
+    n = 2000
+    sources, targets = synthetic_graph(n)
+    pages = [str(i) for i in range(n)]
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources, targets):
+        corpus[pages[source]].add(pages[target])
+    ranks = sparse_pagerank(corpus, DAMPING)
+
+    added = [(pages[i], pages[i + 1]) for i in range(0, 20, 2)]
+    _, warm = update_pagerank(corpus, ranks, DAMPING, added=added)
+    _, cold = power_iteration(TransitionMatrix.from_corpus(corpus), DAMPING)
+    assert warm < cold
+
+
+@pytest.mark.parametrize("method", METHODS)
+@pytest.mark.parametrize("norm", ["l1", "linf"])
+def test_solve(method, norm):
+    n = 300
+    sources, targets = synthetic_graph(n, dangling_ratio=0.2)
+    pages = [str(i) for i in range(n)]
+    transitions = TransitionMatrix.from_edges(pages, sources, targets)
+    expected, _ = power_iteration(transitions, DAMPING, tolerance=1e-14)
+
+    reported = []
+    ranks, residuals = solve(
+        transitions, DAMPING, method=method, norm=norm, tolerance=1e-10,
+        callback=lambda iteration, residual: reported.append((iteration, residual)),
+    )
+    assert reported == list(enumerate(residuals, 1))
+    assert residuals[-1] <= 1e-10
+    assert ranks.sum() == pytest.approx(1)
+    assert np.allclose(ranks, expected, atol=1e-8)
+
+
+def test_gauss_seidel_needs_fewer_iterations():
+    n = 1000
+    sources, targets = synthetic_graph(n)
+    transitions = TransitionMatrix.from_edges([str(i) for i in range(n)], sources, targets)
+    _, power = solve(transitions, DAMPING, method="power")
+    _, gauss_seidel = solve(transitions, DAMPING, method="gauss-seidel")
+    assert len(gauss_seidel) < len(power)
+
+
+def two_clusters(n):
+    # Two unlinked halves make the error decay slowly, at the damping
+    # factor, like on real web graphs with closed communities
+    sources, targets = synthetic_graph(n // 2)
+    more_sources, more_targets = synthetic_graph(n // 2, seed=1)
+    pages = [str(i) for i in range(n)]
+    return TransitionMatrix.from_edges(
+        pages,
+        np.concatenate([sources, more_sources + n // 2]),
+        np.concatenate([targets, more_targets + n // 2]),
+    )
+
+
+def solver_errors(transitions, method, tolerance=1e-8):
+    expected, _ = power_iteration(transitions, DAMPING, tolerance=1e-15)
+    ranks, residuals = solve(transitions, DAMPING, method=method, tolerance=tolerance)
+    return len(residuals), np.abs(ranks - expected).sum()
+
+
+def test_steady():
+    assert steady([1, 0.6, 0.36, 0.216])
+    # Fast convergence is left to power iteration
+    assert not steady([1, 0.4, 0.16, 0.064])
+    assert not steady([1, 0.9, 0.5, 0.45])
+    assert not steady([1, 0.6, 0.36])
+
+
+@pytest.mark.parametrize("method", ["aitken", "quadratic"])
+def test_extrapolation_needs_fewer_iterations(method):
+    transitions = two_clusters(2000)
+    power, power_error = solver_errors(transitions, "power")
+    extrapolated, extrapolated_error = solver_errors(transitions, method)
+    assert extrapolated < power
+    assert extrapolated_error <= 1.5 * power_error
+
+    # On a fast mixing graph it never does worse than power iteration
+    n = 2000
+    sources, targets = synthetic_graph(n)
+    transitions = TransitionMatrix.from_edges([str(i) for i in range(n)], sources, targets)
+    power, power_error = solver_errors(transitions, "power")
+    extrapolated, extrapolated_error = solver_errors(transitions, method)
+    assert extrapolated <= power
+    assert extrapolated_error <= 1.5 * power_error
+
+
+@pytest.mark.parametrize("dangling_ratio", [0.1, 0.5])
+def test_adaptive_does_less_work(monkeypatch, dangling_ratio):
+    steps = []
+
+    class Recording(AdaptiveStep):
+        def __init__(self, *args):
+            super().__init__(*args)
+            steps.append(self)
+
+    monkeypatch.setattr(matrix, "AdaptiveStep", Recording)
+    n = 2000
+    sources, targets = synthetic_graph(n, dangling_ratio=dangling_ratio)
+    transitions = TransitionMatrix.from_edges([str(i) for i in range(n)], sources, targets)
+    power, power_error = solver_errors(transitions, "power")
+    _, adaptive_error = solver_errors(transitions, "adaptive")
+    # Frozen pages cannot hide drift from the convergence test
+    assert adaptive_error <= 1.5 * power_error
+    assert steps[0].updates < power * n
+
+
+def test_solve_rejects_unknown_options():
+    transitions = TransitionMatrix.from_corpus(crawl("corpus0"))
+    with pytest.raises(ValueError):
+        solve(transitions, DAMPING, method="jacobi")
+    with pytest.raises(ValueError):
+        solve(transitions, DAMPING, norm="l2")
+
+
+def test_personalized_pagerank():
+    corpus = crawl("corpus2")
+    personalizations = {
+        "uniform": list(corpus),
+        "python": ["python.html"],
+        "weighted": {"ai.html": 3, "logic.html": 1},
+    }
+    ranks = personalized_pagerank(corpus, DAMPING, personalizations)
+    assert set(ranks) == set(personalizations)
+
+    global_ranks = sparse_pagerank(corpus, DAMPING)
+    for page in corpus:
+        assert ranks["uniform"][page] == pytest.approx(global_ranks[page], abs=1e-8)
+
+    for name, teleport in [("python", {"python.html": 1}), ("weighted", personalizations["weighted"])]:
+        expected = dense_pagerank(corpus, DAMPING, teleport)
+        assert sum(ranks[name].values()) == pytest.approx(1)
+        for page in corpus:
+            assert ranks[name][page] == pytest.approx(expected[page], abs=1e-8)
+    assert ranks["python"]["python.html"] > global_ranks["python.html"]
+
+    with pytest.raises(ValueError):
+        personalized_pagerank(corpus, DAMPING, {"empty": []})
+
+
+def test_personalization_weights():
+    corpus = crawl("corpus2")
+    # A single page is not a sequence of characters
+    ranks = personalized_pagerank(corpus, DAMPING, {"page": "python.html", "list": ["python.html"]})
+    assert ranks["page"] == ranks["list"]
+
+    for weights in [{"ai.html": 2, "logic.html": -1}, {"ai.html": 0, "logic.html": 0}]:
+        with pytest.raises(ValueError):
+            personalized_pagerank(corpus, DAMPING, {"bad": weights})
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,70 @@
+import pytest
+import montecarlo
+from matrix import sparse_pagerank
+from montecarlo import (
+    parallel_sample_pagerank, vectorized_sample_pagerank,
+    split_budget, batch_seeds,
+)
+from pagerank import crawl
+
+DAMPING = 0.85
+
+
+def test_split_budget():
+    assert split_budget(10, 4) == [3, 3, 2, 2]
+    assert sum(split_budget(1000003, 32)) == 1000003
+
+
+def test_batch_seeds():
+    assert batch_seeds(0, 4) == batch_seeds(0, 4)
+    assert len(set(batch_seeds(0, 4))) == 4
+    assert batch_seeds(0, 4) != batch_seeds(1, 4)
+
+
+@pytest.mark.parametrize("sampler", [parallel_sample_pagerank, vectorized_sample_pagerank])
+def test_sampler(sampler):
+    corpus = crawl("corpus2")
+    expected = sparse_pagerank(corpus, DAMPING)
+    ranks, intervals = sampler(corpus, DAMPING, 200000, batches=16, seed=0)
+    assert len(ranks) == len(corpus)
+    assert sum(ranks.values()) == pytest.approx(1)
+    for page in corpus:
+        low, high = intervals[page]
+        assert low <= ranks[page] <= high
+        assert ranks[page] == pytest.approx(expected[page], abs=0.01)
+        # The true value should be well within a wider interval
+        assert abs(ranks[page] - expected[page]) <= 2 * (high - low)
+
+    # Same seed, same estimate
+    assert sampler(corpus, DAMPING, 200000, batches=16, seed=0)[0] == ranks
+
+
+@pytest.mark.parametrize("sampler", [parallel_sample_pagerank, vectorized_sample_pagerank])
+def test_few_samples(sampler):
+    corpus = crawl("corpus0")
+    # Fewer samples than batches and walkers
+    ranks, intervals = sampler(corpus, DAMPING, 10, batches=16, seed=0)
+    assert sum(ranks.values()) == pytest.approx(1)
+    assert all(low <= ranks[page] <= high for page, (low, high) in intervals.items())
+
+    with pytest.raises(ValueError):
+        sampler(corpus, DAMPING, 0)
+
+
+def test_vectorized_counts_every_sample(monkeypatch):
+    totals = []
+    real_estimate = montecarlo.estimate
+
+    def recording(pages, counts):
+        totals.append(int(counts.sum()))
+        return real_estimate(pages, counts)
+
+    monkeypatch.setattr(montecarlo, "estimate", recording)
+    corpus = crawl("corpus0")
+    for n in [15000, 9999, 10000, 10001]:
+        vectorized_sample_pagerank(corpus, DAMPING, n, walkers=10000, seed=0)
+    assert totals == [15000, 9999, 10000, 10001]
+
+
+if __name__ == "__main__":
+    pytest.main()
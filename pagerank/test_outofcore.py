@@ -0,0 +1,110 @@
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+import outofcore
+from benchmark import synthetic_graph
+from crawler import write_edges
+from linkgraph import LinkGraph, convert_edges
+from matrix import TransitionMatrix, power_iteration, sparse_pagerank
+from outofcore import outofcore_pagerank
+from pagerank import crawl, iterate_pagerank
+
+DAMPING = 0.85
+
+
+@pytest.mark.parametrize("directory", ["corpus0", "corpus1", "corpus2"])
+def test_matches_in_memory(tmp_path, directory):
+    path = tmp_path / "corpus.graph"
+    corpus = crawl(directory, save=path)
+    ranks, stats = outofcore_pagerank(path, DAMPING, tolerance=1e-12)
+    expected = sparse_pagerank(corpus, DAMPING)
+    assert ranks.keys() == expected.keys()
+    for page, rank in ranks.items():
+        assert rank == pytest.approx(expected[page], abs=1e-10)
+    assert stats["blocks"] == 1
+    assert stats["peak_rss"] > 0
+
+
+def test_iterate_pagerank_from_file(tmp_path):
+    path = tmp_path / "corpus.graph"
+    corpus = crawl("corpus2", save=path)
+    ranks = iterate_pagerank(str(path), DAMPING, memory_budget=8 << 20)
+    for page, rank in iterate_pagerank(corpus, DAMPING).items():
+        assert ranks[page] == pytest.approx(rank, abs=0.002)
+
+
+def test_small_blocks(tmp_path, monkeypatch):
+    # Blocks of 3 links and 2 source pages split pages with many links
+    sources, targets = synthetic_graph(50, average_links=5, dangling_ratio=0.2)
+    pages = [str(i) for i in range(50)]
+    transitions = TransitionMatrix.from_edges(pages, sources, targets)
+    corpus = {page: set() for page in pages}
+    for source, target in zip(sources, targets):
+        corpus[pages[source]].add(pages[target])
+    path = tmp_path / "synthetic.graph"
+    LinkGraph.from_corpus(corpus).save(path)
+
+    monkeypatch.setattr(outofcore, "block_sizes", lambda count, budget: (3, 2))
+    ranks, stats = outofcore_pagerank(path, DAMPING, tolerance=1e-12)
+    assert stats["blocks"] > len(sources) // 3
+    expected = transitions.to_dict(power_iteration(transitions, DAMPING, tolerance=1e-12)[0])
+    for page, rank in ranks.items():
+        assert rank == pytest.approx(expected[page], abs=1e-10)
+
+
+def test_peak_rss_within_budget(tmp_path):
+    if outofcore.peak_rss() is None:
+        pytest.skip("The resident set size is not available here")
+    n = 200000
+    sources, targets = synthetic_graph(n)
+    offsets = np.searchsorted(sources, np.arange(n + 1)).astype(np.int64)
+    path = tmp_path / "synthetic.graph"
+    LinkGraph([str(i) for i in range(n)], offsets, targets.astype(np.int32)).save(path)
+
+    # The smallest budget the graph allows, run in a fresh process, since
+    # this one keeps freed memory resident and would reuse it
+    budget = n * outofcore.BYTES_PER_PAGE + outofcore.FIXED_BYTES + outofcore.MIN_BLOCK_BYTES
+    script = (
+        "import json, sys, outofcore\n"
+        "_, stats = outofcore.outofcore_pagerank(sys.argv[1], 0.85, int(sys.argv[2]), max_iterations=5)\n"
+        "print(json.dumps(stats))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script, str(path), str(budget)],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.abspath(outofcore.__file__)),
+    )
+    stats = json.loads(result.stdout)
+    assert stats["peak_rss"] - stats["start_rss"] <= budget
+
+
+def test_budget_too_small(tmp_path):
+    path = tmp_path / "corpus.graph"
+    crawl("corpus0", save=path)
+    with pytest.raises(ValueError):
+        outofcore_pagerank(path, DAMPING, memory_budget=1000)
+
+
+def test_empty_graph(tmp_path):
+    path = tmp_path / "empty.graph"
+    LinkGraph.from_corpus({}).save(path)
+    ranks, stats = outofcore_pagerank(path, DAMPING)
+    assert ranks == {}
+    assert stats["iterations"] == 0
+
+
+@pytest.mark.parametrize("directory", ["corpus0", "corpus1", "corpus2"])
+def test_convert_edges(tmp_path, directory):
+    edges = tmp_path / "edges.tsv"
+    path = tmp_path / "corpus.graph"
+    write_edges(directory, edges)
+    assert convert_edges(edges, path, chunk_size=2) == len(crawl(directory))
+    assert dict(LinkGraph.load(path)) == crawl(directory)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -1,5 +1,7 @@
+import random
+
 import pytest
-from pagerank import transition_model, sample_pagerank, iterate_pagerank, crawl
+from pagerank import transition_model, sample_pagerank, iterate_pagerank, crawl, random_walk
 
 DAMPING = 0.85
 
@@ -20,6 +22,22 @@ def test_sample_pagerank():
     assert sum(pagerank.values()) == 1
 
 
+def test_sample_pagerank_matches_iterate():
+    corpus = crawl("corpus2")
+    expected = iterate_pagerank(corpus, damping_factor=DAMPING)
+    pagerank = sample_pagerank(corpus=corpus, damping_factor=DAMPING, n=200000, seed=0)
+    for page in corpus:
+        assert pagerank[page] == pytest.approx(expected[page], abs=0.01)
+    assert pagerank == sample_pagerank(corpus=corpus, damping_factor=DAMPING, n=200000, seed=0)
+
+
+def test_random_walk_dangling_page():
+    # Page 1 has no links, so every step from it is a uniform jump
+    visited = random_walk([[1], []], damping_factor=DAMPING, n=100000, start=0, rng=random.Random(0))
+    assert sum(visited) == 100000
+    assert visited[1] / 100000 == pytest.approx(0.649, abs=0.01)
+
+
 def test_iterate_pagerank():
     # Data set Corpus0
     corpus = crawl("corpus0")
@@ -43,5 +61,19 @@ def test_iterate_pagerank():
     assert sum(pagerank.values()) == 1
 
 
+def test_iterate_pagerank_tolerance():
+    corpus = crawl("corpus2")
+    loose, tight = [], []
+    iterate_pagerank(corpus, DAMPING, callback=lambda i, residual: loose.append(residual))
+    pagerank = iterate_pagerank(corpus, DAMPING, tolerance=1e-10, norm="l1",
+                                callback=lambda i, residual: tight.append(residual))
+    assert loose[-1] <= 0.001
+    assert tight[-1] <= 1e-10
+    assert len(tight) > len(loose)
+    assert sum(pagerank.values()) == pytest.approx(1)
+    with pytest.raises(ValueError):
+        iterate_pagerank(corpus, DAMPING, norm="l2")
+
+
 if __name__ == "__main__":
     pytest.main()
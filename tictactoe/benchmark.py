@@ -0,0 +1,100 @@
+"""
+Benchmarks for the Tic Tac Toe engines.
+
+Usage: python benchmark.py [depth ...]
+"""
+
+import os
+import sys
+import time
+
+import bitboard
+import mnk
+import parallel
+import tictactoe
+
+# Depths of the parallel search comparison
+DEPTHS = (3, 4, 5)
+
+# Opening played before the parallel search comparison on 7x7 connect-5
+OPENING = [(3, 3), (2, 2), (3, 4), (2, 3)]
+
+
+def timed(function, *args, **kwargs):
+    """
+    Returns (result, seconds) of calling `function`.
+    """
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def compare_engines():
+    """
+    Times solving the empty 3x3 board with each engine,
+    with cold transposition tables and without the opening book.
+    """
+    tictactoe.table.clear()
+    _, seconds = timed(tictactoe.maxvalue, tictactoe.initial_state(), tictactoe.MIN, tictactoe.MAX)
+    print(f"  {'lists':>10}: {seconds:.4f}s, {tictactoe.search_stats()['nodes']} nodes")
+
+    bitboard.tables.clear()
+    table = bitboard.table_for(3)
+    full, _, through = bitboard.geometry(3)
+    _, seconds = timed(bitboard.negamax, 0, 0, full, through, -1, 1, table, table.hashes(0, 0), 0)
+    print(f"  {'bitboard':>10}: {seconds:.4f}s, {table.nodes} nodes")
+
+    board = mnk.initial_state()
+    board.game.table.clear()
+    _, seconds = timed(mnk.minimax, board, budget=None, use_book=False)
+    print(f"  {'mnk':>10}: {seconds:.4f}s, {mnk.search_stats()['nodes']} nodes")
+
+
+def compare_parallel(depth, rows=7, cols=7, k=5):
+    """
+    Times a fixed `depth` search of a rows, cols, k opening position
+    single-threaded and split across pools of increasing size, each
+    starting with empty transposition tables.
+    """
+    board = mnk.initial_state(rows, cols, k)
+    for action in OPENING:
+        board = mnk.result(board, action)
+
+    board.game.table.clear()
+    search = mnk.Search(board.game)
+    (score, cell), baseline = timed(search.root, board, depth)
+    print(
+        f"  depth {depth} {'serial':>12}: {baseline:.2f}s, {search.nodes} nodes, "
+        f"move {divmod(cell, cols)} scoring {score}"
+    )
+
+    processes = 1
+    while processes <= max(2, os.cpu_count() or 1):
+        board.game.table.clear()
+        pool = parallel.make_pool(processes)
+        try:
+            action, seconds = timed(parallel.minimax, board, depth, pool)
+        finally:
+            pool.close()
+            pool.join()
+        stats = parallel.last_search
+        print(
+            f"  depth {depth} {processes:>3} processes: {seconds:.2f}s ({baseline / seconds:.2f}x), "
+            f"{stats['nodes']} nodes, move {action} scoring {stats['score']}"
+        )
+        processes *= 2
+
+
+def main():
+    depths = [int(depth) for depth in sys.argv[1:]] or DEPTHS
+
+    print("Solving 3x3")
+    compare_engines()
+
+    print(f"Parallel root splitting on 7x7 connect-5 ({os.cpu_count()} CPUs)")
+    for depth in depths:
+        compare_parallel(depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""
+Bitboard Tic Tac Toe engine.
+
+A position is two integer bitmasks, one per player, where bit r * N + c
+is set when that player holds cell (r, c). Every winning line is a
+precomputed mask, and so is the list of lines through each cell, so
+making a move is an OR and checking whether it won is a few ANDs.
+
+The module mirrors the API of tictactoe.py: `initial_state`, `player`,
+`actions`, `result`, `winner`, `terminal`, `utility` and `minimax`
+accept either a `Board` or the nested lists used by tictactoe.py, and
+a `Board` can be indexed as board[i][j], so runner.py can use either
+module.
+"""
+
+from functools import lru_cache
+
+import book
+from transposition import TranspositionTable
+
+X = "X"
+O = "O"
+EMPTY = None
+N = 3
+
+# Transposition table of each board size, kept between searches
+tables = {}
+
+
+class Board():
+    """
+    Immutable N x N position held as the bitmasks of X and O.
+    """
+
+    __slots__ = ("n", "x", "o")
+
+    def __init__(self, n=N, x=0, o=0):
+        self.n = n
+        self.x = x
+        self.o = o
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Returns the board for nested lists of X, O and EMPTY.
+        """
+        n = len(rows)
+        x = o = 0
+        for r, row in enumerate(rows):
+            for c, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (r * n + c)
+                elif cell == O:
+                    o |= 1 << (r * n + c)
+        return cls(n, x, o)
+
+    def to_rows(self):
+        """
+        Returns the board as nested lists of X, O and EMPTY.
+        """
+        return [list(row) for row in self]
+
+    def __getitem__(self, r):
+        return tuple(self.cell(r, c) for c in range(self.n))
+
+    def __len__(self):
+        return self.n
+
+    def __iter__(self):
+        return (self[r] for r in range(self.n))
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and (self.n, self.x, self.o) == (other.n, other.x, other.o)
+
+    def __hash__(self):
+        return hash((self.n, self.x, self.o))
+
+    def __repr__(self):
+        return f"Board({self.to_rows()})"
+
+    def cell(self, r, c):
+        """
+        Returns X, O or EMPTY for cell (r, c).
+        """
+        bit = 1 << (r * self.n + c)
+        if self.x & bit:
+            return X
+        if self.o & bit:
+            return O
+        return EMPTY
+
+
+@lru_cache(maxsize=None)
+def geometry(n):
+    """
+    Returns (full, lines, through) for an n x n board: the mask of all
+    cells, the mask of every winning line, and for each cell index the
+    masks of the lines through that cell.
+    """
+    def mask(cells):
+        return sum(1 << (r * n + c) for r, c in cells)
+
+    lines = [mask((r, c) for c in range(n)) for r in range(n)]
+    lines += [mask((r, c) for r in range(n)) for c in range(n)]
+    lines.append(mask((i, i) for i in range(n)))
+    lines.append(mask((i, n - 1 - i) for i in range(n)))
+    through = tuple(
+        tuple(line for line in lines if line >> cell & 1)
+        for cell in range(n * n)
+    )
+    return (1 << n * n) - 1, tuple(lines), through
+
+
+def as_board(board):
+    """
+    Returns `board` as a `Board`, converting nested lists.
+    """
+    return board if isinstance(board, Board) else Board.from_rows(board)
+
+
+def initial_state(n=N):
+    """
+    Returns starting state of the board.
+    """
+    return Board(n)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    board = as_board(board)
+    return X if bin(board.x).count("1") <= bin(board.o).count("1") else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    board = as_board(board)
+    full, _, _ = geometry(board.n)
+    return {divmod(cell, board.n) for cell in cells(full & ~(board.x | board.o))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    board = as_board(board)
+    r, c = action
+    if not (0 <= r < board.n and 0 <= c < board.n) or board.cell(r, c) != EMPTY:
+        raise NameError("Invalid action, chess already exist!")
+    bit = 1 << (r * board.n + c)
+    if player(board) == X:
+        return Board(board.n, board.x | bit, board.o)
+    return Board(board.n, board.x, board.o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    board = as_board(board)
+    _, lines, _ = geometry(board.n)
+    for line in lines:
+        if board.x & line == line:
+            return X
+        if board.o & line == line:
+            return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    board = as_board(board)
+    full, _, _ = geometry(board.n)
+    return winner(board) is not None or board.x | board.o == full
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return {X: 1, O: -1}.get(winner(board), 0)
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board,
+    or None if the game is over. Positions in the opening book are
+    answered from it without searching.
+    """
+    board = as_board(board)
+    if terminal(board):
+        return None
+    cell = book.lookup(board.x, board.o, board.n, board.n, board.n)
+    if cell is not None:
+        return divmod(cell, board.n)
+    table = table_for(board.n)
+    turn = 0 if player(board) == X else 1
+    me, other = (board.x, board.o) if turn == 0 else (board.o, board.x)
+    full, _, through = geometry(board.n)
+    hashes = table.hashes(board.x, board.o)
+    _, cell = negamax(me, other, full, through, -1, 1, table, hashes, turn)
+    return divmod(cell, board.n)
+
+
+def table_for(n):
+    """
+    Returns the transposition table used by `minimax` on n x n boards.
+    """
+    if n not in tables:
+        tables[n] = TranspositionTable(n)
+    return tables[n]
+
+
+def search_stats(n=N):
+    """
+    Returns the node count, hit rate and other counters of the
+    transposition table used by `minimax` on n x n boards.
+    """
+    return table_for(n).stats()
+
+
+def negamax(me, other, full, through, alpha, beta, table, hashes, turn):
+    """
+    Returns (score, cell) of the best move for the player holding `me`,
+    where `score` is 1 for a win, 0 for a draw and -1 for a loss, with
+    alpha-beta pruning between `alpha` and `beta`. The position must
+    not be over yet.
+
+    `table` caches results by the position's `hashes`, and `turn` is
+    0 if the player to move is X and 1 if it is O.
+    """
+    table.nodes += 1
+    value, move = table.probe(hashes, alpha, beta)
+    if value is not None:
+        return value, move
+
+    start = alpha
+    best, best_cell = -2, None
+    empty = full & ~(me | other)
+    # Search the stored best move first
+    order = cells(empty)
+    if move is not None:
+        order.remove(move)
+        order.insert(0, move)
+    for cell in order:
+        mine = me | 1 << cell
+        if wins(mine, through[cell]):
+            best, best_cell = 1, cell
+            break
+        if mine | other == full:
+            score = 0
+        else:
+            score = -negamax(
+                other, mine, full, through, -beta, -alpha,
+                table, table.play(hashes, turn, cell), 1 - turn,
+            )[0]
+        if score > best:
+            best, best_cell = score, cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+    table.store(hashes, best, start, beta, best_cell)
+    return best, best_cell
+
+
+def wins(mask, lines):
+    """
+    Returns True if `mask` holds every cell of one of `lines`.
+    """
+    for line in lines:
+        if mask & line == line:
+            return True
+    return False
+
+
+def cells(mask):
+    """
+    Returns the indices of the bits set in `mask`, lowest first.
+    """
+    found = []
+    while mask:
+        bit = mask & -mask
+        found.append(bit.bit_length() - 1)
+        mask ^= bit
+    return found
@@ -0,0 +1,136 @@
+"""
+Opening books for Tic Tac Toe and other m,n,k games.
+
+A book maps positions to the best move found for them by makebook.py.
+Positions are stored in a canonical form: of all the rotations and
+reflections of a position, the one whose masks (x | o << cells) form
+the smallest integer. So one entry serves every symmetric position,
+and its move is mapped back through the symmetry on lookup.
+
+A book file starts with an 8 byte magic, then the rows, cols, k and
+entry count as little-endian integers, then the entries sorted by key,
+each a key of 2 * rows * cols bits rounded up to whole bytes followed
+by a 2 byte cell index. Books live in the `books` directory and are
+only read the first time a position of their game is looked up.
+"""
+
+import os
+import struct
+from functools import lru_cache
+
+from transposition import symmetries
+
+MAGIC = b"TTTBOOK\x01"
+HEADER = struct.Struct("<HHHI")
+MOVE = struct.Struct("<H")
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "books")
+
+# Books read so far, by (rows, cols, k), empty if there is no file
+books = {}
+
+
+def path_for(rows, cols, k, directory=None):
+    """
+    Returns the path of the book of the rows, cols, k game.
+    """
+    return os.path.join(directory or DIRECTORY, f"{rows}x{cols}k{k}.book")
+
+
+def canonical(x, o, rows, cols):
+    """
+    Returns (key, symmetry) for the position with masks `x` and `o`:
+    the smallest key among its symmetric positions, and the index in
+    `transposition.symmetries(rows, cols)` of the symmetry giving it.
+    """
+    size = rows * cols
+    best = None
+    for index, perm in enumerate(symmetry_table(rows, cols)[0]):
+        key = transform(x, perm) | transform(o, perm) << size
+        if best is None or key < best[0]:
+            best = (key, index)
+    return best
+
+
+def transform(mask, perm):
+    """
+    Returns `mask` with every cell moved to where `perm` maps it.
+    """
+    moved = 0
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        moved |= 1 << perm[bit.bit_length() - 1]
+    return moved
+
+
+def lookup(x, o, rows, cols, k):
+    """
+    Returns the book move (a cell index) for the position with masks
+    `x` and `o`, or None if the book of its game has no such position.
+    """
+    book = books.get((rows, cols, k))
+    if book is None:
+        path = path_for(rows, cols, k)
+        book = load(path)[1] if os.path.exists(path) else {}
+        books[(rows, cols, k)] = book
+    if not book:
+        return None
+    key, symmetry = canonical(x, o, rows, cols)
+    move = book.get(key)
+    if move is None:
+        return None
+    return symmetry_table(rows, cols)[1][symmetry][move]
+
+
+@lru_cache(maxsize=None)
+def symmetry_table(rows, cols):
+    """
+    Returns (perms, inverses): the symmetries of a rows x cols board
+    and their inverse permutations.
+    """
+    perms = symmetries(rows, cols)
+    return perms, [[perm.index(cell) for cell in range(rows * cols)] for perm in perms]
+
+
+def save(book, path, rows, cols, k):
+    """
+    Writes `book`, mapping canonical keys to moves in the canonical
+    position, to `path` under a temporary name first.
+    """
+    width = key_width(rows, cols)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(rows, cols, k, len(book)))
+        for key in sorted(book):
+            f.write(key.to_bytes(width, "little"))
+            f.write(MOVE.pack(book[key]))
+    os.replace(temporary, path)
+    books.pop((rows, cols, k), None)
+
+
+def load(path):
+    """
+    Returns ((rows, cols, k), book) for the book file at `path`.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not an opening book: {path}")
+    rows, cols, k, count = HEADER.unpack_from(data, len(MAGIC))
+    width = key_width(rows, cols)
+    position = len(MAGIC) + HEADER.size
+    book = {}
+    for _ in range(count):
+        key = int.from_bytes(data[position:position + width], "little")
+        (book[key],) = MOVE.unpack_from(data, position + width)
+        position += width + MOVE.size
+    return (rows, cols, k), book
+
+
+def key_width(rows, cols):
+    """
+    Returns the bytes a canonical key of a rows x cols board takes.
+    """
+    return (2 * rows * cols + 7) // 8
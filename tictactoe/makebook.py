@@ -0,0 +1,79 @@
+"""
+Builds opening books for book.py.
+
+Usage: python makebook.py rows cols k [--plies PLIES] [--seconds SECONDS]
+                          [--output PATH]
+
+Every position reachable in at most PLIES moves (every position if not
+given) is searched with mnk.minimax, once per set of symmetric
+positions. Without --seconds each search runs to the end of the game,
+which solves the game exactly and is only practical for small boards
+such as 3x3. With --seconds each search gets that budget instead, which
+gives a partial book of good opening moves for larger boards.
+"""
+
+import argparse
+import time
+
+import book
+import mnk
+
+
+def positions(rows, cols, k, plies=None):
+    """
+    Returns the positions of the rows, cols, k game that are reachable
+    in at most `plies` moves and not over, one per set of symmetric
+    positions, keyed by their canonical key.
+    """
+    found = {}
+    frontier = [mnk.initial_state(rows, cols, k)]
+    depth = 0
+    while frontier and (plies is None or depth <= plies):
+        following = []
+        for board in frontier:
+            if mnk.terminal(board):
+                continue
+            key, _ = book.canonical(board.x, board.o, rows, cols)
+            if key in found:
+                continue
+            found[key] = board
+            following.extend(mnk.result(board, action) for action in mnk.actions(board))
+        frontier = following
+        depth += 1
+    return found
+
+
+def build(rows, cols, k, plies=None, seconds=None):
+    """
+    Returns a book for the rows, cols, k game, mapping the canonical key
+    of each position from `positions` to the best move found for it in
+    the canonical position, searching each for `seconds` (no limit if
+    None).
+    """
+    entries = {}
+    for key, board in positions(rows, cols, k, plies).items():
+        r, c = mnk.minimax(board, budget=seconds, use_book=False)
+        _, symmetry = book.canonical(board.x, board.o, rows, cols)
+        entries[key] = book.symmetry_table(rows, cols)[0][symmetry][r * cols + c]
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an opening book.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("cols", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--plies", type=int, help="deepest position in the book, in moves")
+    parser.add_argument("--seconds", type=float, help="search budget per position")
+    parser.add_argument("--output", help="book file, by default in the books directory")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    entries = build(args.rows, args.cols, args.k, args.plies, args.seconds)
+    path = args.output or book.path_for(args.rows, args.cols, args.k)
+    book.save(entries, path, args.rows, args.cols, args.k)
+    print(f"Wrote {len(entries)} positions to {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,455 @@
+"""
+Generalized m,n,k game engine.
+
+Players take turns on a board of `rows` x `cols` cells, and the first to
+get `k` in a row, horizontally, vertically or diagonally, wins. Tic Tac
+Toe is the 3,3,3 game. Positions are two bitmasks as in bitboard.py,
+with every window of k cells in a line precomputed as a mask.
+
+Boards beyond 3x3 cannot be searched to the end, so `minimax` runs an
+iterative-deepening negamax alpha-beta search within a wall-clock
+budget, and scores positions it cannot search further by counting the
+windows each player could still fill. Moves are searched in the order
+transposition table move, killer moves, history score, then closeness
+to the centre, and only cells near the stones already played are
+considered.
+"""
+
+import time
+from functools import lru_cache
+
+import book
+from bitboard import EMPTY, O, X, cells, wins
+from transposition import TranspositionTable
+
+ROWS = 3
+COLS = 3
+K = 3
+
+# Seconds `minimax` may spend on a move by default
+TIME_BUDGET = 1.0
+
+# Score of a won position, minus the plies it takes to win. Heuristic
+# scores stay below WIN - MAX_PLY.
+WIN = 10 ** 12
+MAX_PLY = 10 ** 4
+INFINITY = WIN + 1
+
+# Only cells this far from a stone are searched
+NEAR = 2
+
+# Killer moves kept per ply
+KILLERS = 2
+
+# Entries kept in each game's transposition table
+TABLE_CAPACITY = 1 << 20
+
+# Nodes searched between clock checks
+CLOCK_INTERVAL = 256
+
+# Counters of the last search run by `minimax`
+last_search = {}
+
+
+class Game():
+    """
+    Precomputed masks of the rows, cols, k game.
+    """
+
+    def __init__(self, rows, cols, k):
+        if not 1 <= k <= max(rows, cols):
+            raise ValueError(f"Cannot get {k} in a row on a {rows}x{cols} board")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+
+        windows = []
+        for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for r in range(rows):
+                for c in range(cols):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < cols:
+                        windows.append(sum(
+                            1 << ((r + dr * i) * cols + c + dc * i) for i in range(k)
+                        ))
+        self.windows = tuple(windows)
+        self.through = tuple(
+            tuple(window for window in windows if window >> cell & 1)
+            for cell in range(self.size)
+        )
+        self.near = tuple(
+            sum(
+                1 << (r * cols + c)
+                for r in range(max(0, cell // cols - NEAR), min(rows, cell // cols + NEAR + 1))
+                for c in range(max(0, cell % cols - NEAR), min(cols, cell % cols + NEAR + 1))
+            )
+            for cell in range(self.size)
+        )
+        # Higher for cells closer to the centre
+        self.centrality = tuple(
+            -abs(2 * (cell // cols) - (rows - 1)) - abs(2 * (cell % cols) - (cols - 1))
+            for cell in range(self.size)
+        )
+        # Worth of a window holding i stones of one player and none of the other
+        self.weights = (0,) + tuple(10 ** (i - 1) for i in range(1, k + 1))
+        self.table = TranspositionTable(rows, cols, capacity=TABLE_CAPACITY)
+
+
+@lru_cache(maxsize=None)
+def game(rows=ROWS, cols=COLS, k=K):
+    """
+    Returns the `Game` of the given size, built once.
+    """
+    return Game(rows, cols, k)
+
+
+class Board():
+    """
+    Immutable position of an m,n,k game held as the bitmasks of X and O.
+    """
+
+    __slots__ = ("game", "x", "o")
+
+    def __init__(self, game, x=0, o=0):
+        self.game = game
+        self.x = x
+        self.o = o
+
+    def __getitem__(self, r):
+        return tuple(self.cell(r, c) for c in range(self.game.cols))
+
+    def __len__(self):
+        return self.game.rows
+
+    def __iter__(self):
+        return (self[r] for r in range(self.game.rows))
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and (self.game, self.x, self.o) == (other.game, other.x, other.o)
+
+    def __hash__(self):
+        return hash((self.game.rows, self.game.cols, self.game.k, self.x, self.o))
+
+    def __repr__(self):
+        return f"Board({[list(row) for row in self]})"
+
+    def cell(self, r, c):
+        """
+        Returns X, O or EMPTY for cell (r, c).
+        """
+        bit = 1 << (r * self.game.cols + c)
+        if self.x & bit:
+            return X
+        if self.o & bit:
+            return O
+        return EMPTY
+
+
+def initial_state(rows=ROWS, cols=COLS, k=K):
+    """
+    Returns starting state of the board.
+    """
+    return Board(game(rows, cols, k))
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return X if board.x.bit_count() <= board.o.bit_count() else O
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    cols = board.game.cols
+    return {divmod(cell, cols) for cell in cells(board.game.full & ~(board.x | board.o))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    r, c = action
+    rows, cols = board.game.rows, board.game.cols
+    if not (0 <= r < rows and 0 <= c < cols) or board.cell(r, c) != EMPTY:
+        raise NameError("Invalid action, chess already exist!")
+    bit = 1 << (r * cols + c)
+    if player(board) == X:
+        return Board(board.game, board.x | bit, board.o)
+    return Board(board.game, board.x, board.o | bit)
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    for window in board.game.windows:
+        if board.x & window == window:
+            return X
+        if board.o & window == window:
+            return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    return winner(board) is not None or board.x | board.o == board.game.full
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    return {X: 1, O: -1}.get(winner(board), 0)
+
+
+def minimax(board, budget=TIME_BUDGET, max_depth=None, use_book=True, pool=None):
+    """
+    Returns the best action found for the current player on the board
+    within `budget` seconds (no limit if None), searching at most
+    `max_depth` plies, or None if the game is over.
+
+    If `pool` is a pool from `parallel.make_pool`, the root moves of
+    every depth are split across its workers (see parallel.py).
+
+    If `use_book`, positions in the opening book of the game are
+    answered from it.
+    Otherwise each depth is searched in turn, and the move of the
+    deepest search that finished is played. A depth is not started once
+    half the budget is spent, since it would not finish in time.
+    Counters of the search are kept in `last_search`.
+    """
+    if terminal(board):
+        return None
+    started = time.perf_counter()
+    game = board.game
+    cell = book.lookup(board.x, board.o, game.rows, game.cols, game.k) if use_book else None
+    if cell is not None:
+        last_search.clear()
+        last_search.update({"book": True, "seconds": time.perf_counter() - started})
+        return divmod(cell, game.cols)
+
+    # The table is kept between moves, so count from here
+    counters = game.table.stats()
+    search = Search(board.game, None if budget is None else started + budget)
+    empty = (board.game.full & ~(board.x | board.o)).bit_count()
+    max_depth = empty if max_depth is None else min(max_depth, empty)
+    if pool is not None:
+        import parallel
+
+    best, score, depth, worker_nodes = None, 0, 0, 0
+    for depth in range(1, max_depth + 1):
+        try:
+            if pool is None:
+                score, best = search.root(board, depth)
+            else:
+                score, best, nodes, _ = parallel.search_root(board, depth, pool, search.deadline)
+                worker_nodes += nodes
+        except Timeout:
+            depth -= 1
+            break
+        # Stop once the result is a forced win or loss
+        if abs(score) > WIN - board.game.size:
+            break
+        if budget is not None and time.perf_counter() - started > budget / 2:
+            break
+    if best is None:
+        best = search.order(board.game.full & ~(board.x | board.o), None, 0)[0]
+
+    last_search.clear()
+    last_search.update({
+        "book": False,
+        "depth": depth,
+        "score": score,
+        "nodes": search.nodes + worker_nodes,
+        "seconds": time.perf_counter() - started,
+        "table": game.table.stats(since=counters),
+    })
+    return divmod(best, board.game.cols)
+
+
+def search_stats():
+    """
+    Returns whether the last `minimax` move came from the opening book,
+    and otherwise the depth reached, score, node count, seconds and
+    transposition table counters of its search.
+    """
+    return dict(last_search)
+
+
+class Timeout(Exception):
+    """
+    Raised inside a search once its deadline has passed.
+    """
+
+
+class Search():
+    """
+    State of one iterative-deepening search: the killer moves of
+    every ply, the history score of every cell and the node count.
+    """
+
+    def __init__(self, game, deadline=None, table=None):
+        self.game = game
+        self.table = game.table if table is None else table
+        self.deadline = deadline
+        self.killers = [[None] * KILLERS for _ in range(game.size + 1)]
+        self.history = [0] * game.size
+        self.nodes = 0
+
+    def root(self, board, depth):
+        """
+        Returns (score, cell) of a `depth` ply search of `board`, where
+        `score` is from the point of view of the player to move.
+        """
+        turn = 0 if player(board) == X else 1
+        me, other = (board.x, board.o) if turn == 0 else (board.o, board.x)
+        hashes = self.table.hashes(board.x, board.o)
+        return self.negamax(me, other, near_stones(board), hashes, turn, depth, 0, -INFINITY, INFINITY)
+
+    def move_score(self, board, cell, depth, alpha=-INFINITY, beta=INFINITY):
+        """
+        Returns the score for the player to move of playing `cell` on
+        `board`, searching `depth` plies in all, with alpha-beta pruning
+        between `alpha` and `beta`.
+        """
+        turn = 0 if player(board) == X else 1
+        me, other = (board.x, board.o) if turn == 0 else (board.o, board.x)
+        mine = me | 1 << cell
+        if wins(mine, self.game.through[cell]):
+            return WIN
+        if mine | other == self.game.full:
+            return 0
+        hashes = self.table.play(self.table.hashes(board.x, board.o), turn, cell)
+        return -self.negamax(
+            other, mine, near_stones(board) | self.game.near[cell], hashes,
+            1 - turn, depth - 1, 1, -beta, -alpha,
+        )[0]
+
+    def negamax(self, me, other, near, hashes, turn, depth, ply, alpha, beta):
+        """
+        Returns (score, cell) of the best move for the player holding
+        `me`, searching `depth` more plies, `ply` plies below the root,
+        with alpha-beta pruning between `alpha` and `beta`. `near` masks
+        the cells next to stones and `turn` is 0 if X is to move and 1
+        if O is. The position must not be over yet.
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CLOCK_INTERVAL == 0 \
+                and time.perf_counter() > self.deadline:
+            raise Timeout
+        game = self.game
+        table = self.table
+        table.nodes += 1
+
+        value, move = table.probe(hashes, to_table(alpha, ply), to_table(beta, ply), depth)
+        if value is not None and ply > 0:
+            return from_table(value, ply), move
+
+        empty = game.full & ~(me | other)
+        if depth == 0:
+            return evaluate(me, other, game), None
+
+        start = alpha
+        best, best_cell = -INFINITY, None
+        for cell in self.order(near & empty or empty, move, ply):
+            mine = me | 1 << cell
+            if wins(mine, game.through[cell]):
+                best, best_cell = WIN - ply, cell
+                break
+            if mine | other == game.full:
+                score = 0
+            else:
+                score = -self.negamax(
+                    other, mine, near | game.near[cell], table.play(hashes, turn, cell),
+                    1 - turn, depth - 1, ply + 1, -beta, -alpha,
+                )[0]
+            if score > best:
+                best, best_cell = score, cell
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        self.cutoff(cell, depth, ply)
+                        break
+        table.store(hashes, to_table(best, ply), to_table(start, ply), to_table(beta, ply), best_cell, depth)
+        return best, best_cell
+
+    def order(self, candidates, move, ply):
+        """
+        Returns the cells of `candidates` in the order to search them.
+        """
+        killers = self.killers[ply]
+        history = self.history
+        centrality = self.game.centrality
+        return sorted(
+            cells(candidates),
+            key=lambda cell: (cell == move, cell in killers, history[cell], centrality[cell]),
+            reverse=True,
+        )
+
+    def cutoff(self, cell, depth, ply):
+        """
+        Records that `cell` caused a beta cutoff `ply` plies deep.
+        """
+        killers = self.killers[ply]
+        if cell not in killers:
+            killers.pop()
+            killers.insert(0, cell)
+        self.history[cell] += depth * depth
+
+
+def near_stones(board):
+    """
+    Returns the mask of the cells near the stones on `board`.
+    """
+    near = 0
+    for cell in cells(board.x | board.o):
+        near |= board.game.near[cell]
+    return near
+
+
+def evaluate(me, other, game):
+    """
+    Returns a heuristic score for the player holding `me`: the worth of
+    the windows only they have stones in, minus the worth of the windows
+    only the other player has stones in.
+    """
+    weights = game.weights
+    score = 0
+    for window in game.windows:
+        mine = me & window
+        theirs = other & window
+        if mine and not theirs:
+            score += weights[mine.bit_count()]
+        elif theirs and not mine:
+            score -= weights[theirs.bit_count()]
+    return score
+
+
+def to_table(score, ply):
+    """
+    Returns `score` as stored in the transposition table, where wins
+    count plies from the position instead of from the root.
+    """
+    if WIN - MAX_PLY < score <= WIN:
+        return score + ply
+    if -WIN <= score < -WIN + MAX_PLY:
+        return score - ply
+    return score
+
+
+def from_table(score, ply):
+    """
+    Returns a transposition table `score` counted from the root.
+    """
+    if WIN - MAX_PLY < score <= WIN:
+        return score - ply
+    if -WIN <= score < -WIN + MAX_PLY:
+        return score + ply
+    return score
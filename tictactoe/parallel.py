@@ -0,0 +1,139 @@
+"""
+Parallel root-splitting search for m,n,k games.
+
+The root moves of a fixed-depth search are split across a pool of
+processes, Young Brothers Wait style: the first move in search order is
+searched here, and its score becomes the alpha bound for all the other
+root moves, which are then handed to the workers in order. The best
+score so far is shared between the processes, so every move a worker
+starts is searched with the highest alpha found by then, not just the
+eldest brother's. Each worker keeps its own transposition table between
+moves, and nothing else is shared between processes but the tasks and
+their scores.
+
+`mnk.minimax(board, pool=make_pool())` runs its iterative deepening on
+this search. The speedup over the serial search has not been measured:
+the machine it was written on has a single CPU, where the workers only
+take turns.
+"""
+
+import multiprocessing
+import time
+
+import mnk
+
+# Counters of the last search run by `minimax`
+last_search = {}
+
+# In workers: the (search id, alpha) pair shared with the parent
+shared = None
+
+
+def make_pool(processes=None):
+    """
+    Returns a pool of `processes` search workers. The pool carries the
+    (search id, alpha) pair its workers share as `pool.shared`.
+    """
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    bound = context.Array("q", [0, -mnk.INFINITY])
+    pool = context.Pool(processes, initializer=init_worker, initargs=(bound,))
+    pool.shared = bound
+    return pool
+
+
+def init_worker(bound):
+    """
+    Keeps the (search id, alpha) pair shared with the parent.
+    """
+    global shared
+    shared = bound
+
+
+def minimax(board, depth, pool):
+    """
+    Returns the best action for the current player on the board found
+    by a `depth` ply search split across `pool`, or None if the game is
+    over. Counters of the search are kept in `last_search`.
+    """
+    if mnk.terminal(board):
+        return None
+    started = time.perf_counter()
+    score, cell, nodes, moves = search_root(board, depth, pool)
+
+    last_search.clear()
+    last_search.update({
+        "depth": depth,
+        "score": score,
+        "nodes": nodes,
+        "moves": moves,
+        "seconds": time.perf_counter() - started,
+    })
+    return divmod(cell, board.game.cols)
+
+
+def search_root(board, depth, pool, deadline=None):
+    """
+    Returns (score, cell, nodes, moves) of a `depth` ply search of
+    `board` split across `pool`, where `moves` counts the root moves.
+    Raises `mnk.Timeout` if the search passes `deadline`, a
+    `time.perf_counter` value.
+    """
+    game = board.game
+    search = mnk.Search(game, deadline)
+    empty = game.full & ~(board.x | board.o)
+    order = search.order(empty & mnk.near_stones(board) or empty, None, 0)
+
+    # The eldest brother is searched first, to give the others a bound
+    alpha = search.move_score(board, order[0], depth)
+    nodes = search.nodes
+    with pool.shared.get_lock():
+        search_id = pool.shared[0] + 1
+        pool.shared[0], pool.shared[1] = search_id, alpha
+
+    # Workers compare the deadline against the wall clock, which unlike
+    # `time.perf_counter` is the same in every process
+    wall_deadline = None if deadline is None else time.time() + deadline - time.perf_counter()
+    tasks = [
+        (game.rows, game.cols, game.k, board.x, board.o, cell, depth, search_id, wall_deadline)
+        for cell in order[1:]
+    ]
+    best, best_cell = alpha, order[0]
+    for cell, score, worker_nodes in pool.imap(search_move, tasks):
+        if score is None:
+            raise mnk.Timeout
+        nodes += worker_nodes
+        # Scores at or below the alpha a move was searched with only
+        # bound it from above, and that alpha is at most `best`, so only
+        # moves scoring above `best` can replace it
+        if score > best:
+            best, best_cell = score, cell
+    return best, best_cell, nodes, len(order)
+
+
+def search_move(task):
+    """
+    Returns (cell, score, nodes) for one root move searched in a worker,
+    where `task` is (rows, cols, k, x, o, cell, depth, search id, wall
+    clock deadline or None). The score is None if the deadline passed.
+
+    The move is searched with the best alpha of the search so far, and
+    a better score is shared with the moves started after it.
+    """
+    rows, cols, k, x, o, cell, depth, search_id, wall_deadline = task
+    with shared.get_lock():
+        if shared[0] != search_id:
+            # Left over from a search that was given up
+            return cell, None, 0
+        alpha = shared[1]
+    game = mnk.game(rows, cols, k)
+    deadline = None if wall_deadline is None else time.perf_counter() + wall_deadline - time.time()
+    search = mnk.Search(game, deadline)
+    try:
+        score = search.move_score(mnk.Board(game, x, o), cell, depth, alpha)
+    except mnk.Timeout:
+        return cell, None, search.nodes
+    with shared.get_lock():
+        if shared[0] == search_id and score > shared[1]:
+            shared[1] = score
+    return cell, score, search.nodes
@@ -2,7 +2,32 @@ import pygame
 import sys
 import time
 
-import tictactoe as ttt
+USAGE = "Usage: python runner.py [rows cols k [seconds]]"
+if len(sys.argv) not in [1, 4, 5]:
+    sys.exit(USAGE)
+if len(sys.argv) > 1:
+    import mnk as ttt
+    try:
+        rows, cols, k = (int(arg) for arg in sys.argv[1:4])
+        budget = float(sys.argv[4]) if len(sys.argv) > 4 else ttt.TIME_BUDGET
+        ttt.game(rows, cols, k)
+    except ValueError as error:
+        sys.exit(f"{error}\n{USAGE}")
+
+    def new_board():
+        return ttt.initial_state(rows, cols, k)
+
+    def ai_move(board):
+        return ttt.minimax(board, budget)
+else:
+    import bitboard as ttt
+    rows, cols = ttt.N, ttt.N
+
+    def new_board():
+        return ttt.initial_state()
+
+    def ai_move(board):
+        return ttt.minimax(board)
 
 pygame.init()
 size = width, height = 600, 400
@@ -15,10 +40,13 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Shrink the tiles to fit larger boards
+tile_size = min(80, (height - 80) // rows, (width - 40) // cols)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
-board = ttt.initial_state()
+board = new_board()
 ai_turn = False
 
 while True:
@@ -67,13 +95,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -112,7 +139,7 @@ while True:
         if user != player and not game_over:
             if ai_turn:
                 time.sleep(0.5)
-                move = ttt.minimax(board)
+                move = ai_move(board)
                 board = ttt.result(board, move)
                 ai_turn = False
             else:
@@ -122,8 +149,8 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
@@ -140,7 +167,7 @@ while True:
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
                     user = None
-                    board = ttt.initial_state()
+                    board = new_board()
                     ai_turn = False
 
     pygame.display.flip()
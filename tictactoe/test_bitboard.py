@@ -0,0 +1,95 @@
+import random
+
+import pytest
+import bitboard
+import tictactoe
+from bitboard import O, X, EMPTY, Board
+
+
+def random_games(count, seed=0):
+    """
+    Yields every position of `count` random games, as nested lists.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        board = tictactoe.initial_state()
+        yield board
+        while not tictactoe.terminal(board):
+            board = tictactoe.result(board, rng.choice(sorted(tictactoe.actions(board))))
+            yield board
+
+
+def test_round_trip():
+    rows = [[X, O, EMPTY], [EMPTY, X, EMPTY], [O, EMPTY, EMPTY]]
+    board = Board.from_rows(rows)
+    assert board.to_rows() == rows
+    assert board[0][1] == O
+    assert board[2][2] is EMPTY
+    assert len(board) == 3
+    assert Board.from_rows(rows) == board
+    assert hash(Board.from_rows(rows)) == hash(board)
+
+
+def test_matches_list_engine():
+    for rows in random_games(200):
+        board = Board.from_rows(rows)
+        for engine_board in (rows, board):
+            assert bitboard.player(engine_board) == tictactoe.player(rows)
+            assert bitboard.actions(engine_board) == tictactoe.actions(rows)
+            assert bitboard.winner(engine_board) == tictactoe.winner(rows)
+            assert bitboard.terminal(engine_board) == tictactoe.terminal(rows)
+            assert bitboard.utility(engine_board) == tictactoe.utility(rows)
+        for action in tictactoe.actions(rows):
+            assert bitboard.result(board, action).to_rows() == tictactoe.result(rows, action)
+
+
+def test_result_does_not_modify_board():
+    board = bitboard.initial_state()
+    after = bitboard.result(board, (1, 1))
+    assert board == bitboard.initial_state()
+    assert after[1][1] == X
+    assert bitboard.result(after, (0, 0))[0][0] == O
+
+
+@pytest.mark.parametrize("action", [(1, 1), (-1, 0), (0, 3)])
+def test_invalid_action(action):
+    board = bitboard.result(bitboard.initial_state(), (1, 1))
+    with pytest.raises(NameError):
+        bitboard.result(board, action)
+
+
+def test_minimax_is_optimal():
+    # Every move chosen keeps the value the list engine finds
+    for rows in random_games(8, seed=1):
+        if tictactoe.terminal(rows):
+            assert bitboard.minimax(rows) is None
+            continue
+        search = tictactoe.maxvalue if tictactoe.player(rows) == X else tictactoe.minvalue
+        value, _ = search(rows, tictactoe.MIN, tictactoe.MAX)
+        action = bitboard.minimax(rows)
+        assert action in tictactoe.actions(rows)
+        after = tictactoe.result(rows, action)
+        reply = tictactoe.minvalue if tictactoe.player(after) == O else tictactoe.maxvalue
+        if tictactoe.terminal(after):
+            assert tictactoe.utility(after) == value
+        else:
+            assert reply(after, tictactoe.MIN, tictactoe.MAX)[0] == value
+
+
+def test_self_play_draws():
+    board = bitboard.initial_state()
+    while not bitboard.terminal(board):
+        board = bitboard.result(board, bitboard.minimax(board))
+    assert bitboard.winner(board) is None
+
+
+def test_larger_board():
+    board = bitboard.initial_state(4)
+    for action in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2), (1, 2)]:
+        board = bitboard.result(board, action)
+    assert bitboard.minimax(board) == (0, 3)
+    assert bitboard.winner(bitboard.result(board, (0, 3))) == X
+
+
+if __name__ == "__main__":
+    pytest.main()
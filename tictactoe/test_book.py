@@ -0,0 +1,113 @@
+from functools import lru_cache
+
+import pytest
+import bitboard
+import book
+import makebook
+import mnk
+import tictactoe
+from transposition import symmetries
+
+
+@lru_cache(maxsize=None)
+def value(x, o):
+    """
+    Returns the value of a 3x3 position for the player to move,
+    by plain search.
+    """
+    full, _, through = bitboard.geometry(3)
+    me, other = (x, o) if bin(x).count("1") <= bin(o).count("1") else (o, x)
+    best = -1
+    empty = full & ~(x | o)
+    if not empty:
+        return 0
+    for cell in bitboard.cells(empty):
+        mine = me | 1 << cell
+        if bitboard.wins(mine, through[cell]):
+            return 1
+        score = 0 if mine | other == full else -value(*((mine, other) if me == x else (other, mine)))
+        best = max(best, score)
+    return best
+
+
+def reachable():
+    """
+    Returns every 3x3 position reachable in play that is not over.
+    """
+    found = set()
+    frontier = [bitboard.initial_state()]
+    while frontier:
+        board = frontier.pop()
+        if board in found or bitboard.terminal(board):
+            continue
+        found.add(board)
+        frontier.extend(bitboard.result(board, action) for action in bitboard.actions(board))
+    return found
+
+
+def test_canonical_is_shared_by_symmetric_positions():
+    x, o = 0b000000011, 0b000010000
+    key, _ = book.canonical(x, o, 3, 3)
+    for perm in symmetries(3, 3):
+        assert book.canonical(book.transform(x, perm), book.transform(o, perm), 3, 3)[0] == key
+
+
+def test_save_and_load(tmp_path):
+    entries = {5: 0, 1 << 17: 8, 12345: 4}
+    path = tmp_path / "test.book"
+    book.save(entries, path, 3, 3, 3)
+    assert book.load(path) == ((3, 3, 3), entries)
+    (tmp_path / "bad.book").write_bytes(b"nonsense")
+    with pytest.raises(ValueError):
+        book.load(tmp_path / "bad.book")
+
+
+def test_book_is_perfect():
+    positions = reachable()
+    assert len(positions) == 4520
+    for board in positions:
+        cell = book.lookup(board.x, board.o, 3, 3, 3)
+        assert cell is not None
+        after = bitboard.result(board, divmod(cell, 3))
+        if bitboard.terminal(after):
+            assert bitboard.winner(after) is not None or value(board.x, board.o) == 0
+        else:
+            assert -value(after.x, after.o) == value(board.x, board.o)
+
+
+def test_minimax_uses_book():
+    tictactoe.table.clear()
+    assert tictactoe.minimax(tictactoe.initial_state()) is not None
+    assert tictactoe.search_stats()["nodes"] == 0
+
+    assert mnk.minimax(mnk.initial_state()) is not None
+    assert mnk.search_stats()["book"]
+
+
+def test_partial_book(tmp_path, monkeypatch):
+    monkeypatch.setattr(book, "DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(book, "books", {})
+    entries = makebook.build(4, 4, 3, plies=1, seconds=0.05)
+    # The empty board and the three distinct first moves
+    assert len(entries) == 4
+    book.save(entries, book.path_for(4, 4, 3), 4, 4, 3)
+
+    board = mnk.initial_state(4, 4, 3)
+    first = mnk.minimax(board)
+    assert mnk.search_stats()["book"]
+    board = mnk.result(board, first)
+    assert mnk.minimax(board) in mnk.actions(board)
+    assert mnk.search_stats()["book"]
+    board = mnk.result(board, mnk.minimax(board))
+    assert mnk.minimax(board, budget=0.05) in mnk.actions(board)
+    assert not mnk.search_stats()["book"]
+
+
+def test_no_book(tmp_path, monkeypatch):
+    monkeypatch.setattr(book, "DIRECTORY", str(tmp_path))
+    monkeypatch.setattr(book, "books", {})
+    assert book.lookup(0, 0, 3, 3, 3) is None
+
+
+if __name__ == "__main__":
+    pytest.main()
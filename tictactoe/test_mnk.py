@@ -0,0 +1,145 @@
+import random
+import time
+
+import pytest
+import bitboard
+import mnk
+from mnk import O, X, EMPTY
+from transposition import TranspositionTable
+
+
+def play(board, moves):
+    """
+    Returns `board` after playing `moves` in turn.
+    """
+    for move in moves:
+        board = mnk.result(board, move)
+    return board
+
+
+def exact_value(board):
+    """
+    Returns the value of a 3x3 position for the player to move.
+    """
+    turn = 0 if mnk.player(board) == X else 1
+    me, other = (board.x, board.o) if turn == 0 else (board.o, board.x)
+    full, _, through = bitboard.geometry(3)
+    table = TranspositionTable(3)
+    return bitboard.negamax(me, other, full, through, -1, 1, table, table.hashes(board.x, board.o), turn)[0]
+
+
+@pytest.mark.parametrize("rows, cols, k, windows", [
+    (3, 3, 3, 8), (4, 4, 3, 24), (7, 7, 5, 60), (4, 6, 4, 24),
+])
+def test_windows(rows, cols, k, windows):
+    game = mnk.game(rows, cols, k)
+    assert len(game.windows) == windows
+    assert all(window.bit_count() == k for window in game.windows)
+    assert mnk.game(rows, cols, k) is game
+
+
+def test_impossible_game():
+    with pytest.raises(ValueError):
+        mnk.initial_state(3, 3, 4)
+
+
+def test_matches_bitboard():
+    rng = random.Random(0)
+    for _ in range(100):
+        board, reference = mnk.initial_state(), bitboard.initial_state()
+        while not bitboard.terminal(reference):
+            assert mnk.player(board) == bitboard.player(reference)
+            assert mnk.actions(board) == bitboard.actions(reference)
+            assert mnk.winner(board) == bitboard.winner(reference)
+            assert not mnk.terminal(board)
+            action = rng.choice(sorted(mnk.actions(board)))
+            board, reference = mnk.result(board, action), bitboard.result(reference, action)
+        assert mnk.terminal(board)
+        assert mnk.utility(board) == bitboard.utility(reference)
+        assert [list(row) for row in board] == reference.to_rows()
+
+
+def test_rectangular_board():
+    board = play(mnk.initial_state(4, 6, 4), [(3, 0), (0, 0), (3, 1), (0, 1), (3, 2), (0, 2)])
+    assert len(board) == 4 and len(board[0]) == 6
+    assert board[3][2] == X and board[0][2] == O and board[1][1] is EMPTY
+    assert mnk.minimax(board, budget=None, max_depth=2) == (3, 3)
+    with pytest.raises(NameError):
+        mnk.result(board, (4, 0))
+
+
+def test_perfect_on_3x3():
+    rng = random.Random(1)
+    for _ in range(20):
+        board = mnk.initial_state()
+        while not mnk.terminal(board):
+            value = exact_value(board)
+            action = mnk.minimax(board, budget=None)
+            after = mnk.result(board, action)
+            if mnk.terminal(after):
+                assert mnk.utility(after) * (1 if mnk.player(board) == X else -1) == value
+            else:
+                assert -exact_value(after) == value
+            # Alternate engine moves with random ones
+            board = mnk.result(after, rng.choice(sorted(mnk.actions(after)))) \
+                if not mnk.terminal(after) else after
+    assert mnk.minimax(board) is None
+
+
+def test_takes_win_and_blocks():
+    # X has four in a row open at both ends and wins at once
+    board = play(mnk.initial_state(7, 7, 5), [
+        (3, 1), (0, 0), (3, 2), (0, 6), (3, 3), (6, 0), (3, 4), (6, 6),
+    ])
+    assert mnk.minimax(board, budget=0.5) in {(3, 0), (3, 5)}
+    assert mnk.search_stats()["score"] > mnk.WIN - 10
+
+    # O must block X's four
+    board = play(mnk.initial_state(7, 7, 5), [
+        (3, 1), (0, 0), (3, 2), (0, 6), (3, 3), (6, 6), (3, 4),
+    ])
+    assert mnk.minimax(board, budget=0.5) in {(3, 0), (3, 5)}
+
+
+@pytest.mark.parametrize("budget", [0.1, 0.3])
+def test_time_budget(budget):
+    board = play(mnk.initial_state(7, 7, 5), [(3, 3), (2, 2), (3, 4)])
+    started = time.perf_counter()
+    action = mnk.minimax(board, budget=budget)
+    elapsed = time.perf_counter() - started
+    assert action in mnk.actions(board)
+    assert elapsed < budget + 0.1
+    stats = mnk.search_stats()
+    assert stats["depth"] >= 1
+    assert stats["nodes"] > 0
+
+
+def test_table_stats_cover_last_search():
+    board = play(mnk.initial_state(6, 6, 4), [(2, 2), (3, 3)])
+    table = board.game.table
+    probes = table.probes
+    mnk.minimax(board, max_depth=2, use_book=False)
+    first = mnk.search_stats()["table"]
+    mnk.minimax(board, max_depth=2, use_book=False)
+    second = mnk.search_stats()["table"]
+    assert first["probes"] + second["probes"] == table.probes - probes
+    # The second search finds the entries the first one stored
+    assert second["hits"] > 0
+    assert second["nodes"] <= first["nodes"]
+
+
+def test_ordering_heuristics():
+    game = mnk.game(7, 7, 5)
+    search = mnk.Search(game)
+    search.cutoff(10, 3, 2)
+    search.cutoff(11, 1, 2)
+    assert search.killers[2] == [11, 10]
+    assert search.history[10] == 9
+    order = search.order(game.full, 30, 2)
+    assert order[:3] == [30, 10, 11]
+    # With nothing else to go on, the centre comes first
+    assert mnk.Search(game).order(game.full, None, 0)[0] == 24
+
+
+if __name__ == "__main__":
+    pytest.main()
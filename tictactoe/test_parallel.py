@@ -0,0 +1,83 @@
+import time
+
+import pytest
+import mnk
+import parallel
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = parallel.make_pool(2)
+    yield pool
+    pool.close()
+    pool.join()
+
+
+def play(board, moves):
+    """
+    Returns `board` after playing `moves` in turn.
+    """
+    for move in moves:
+        board = mnk.result(board, move)
+    return board
+
+
+@pytest.mark.parametrize("rows, cols, k, moves, depth", [
+    (7, 7, 5, [(3, 3), (2, 2), (3, 4), (2, 3)], 3),
+    (5, 5, 4, [(2, 2), (1, 1)], 3),
+    (4, 6, 4, [(3, 0), (0, 0), (3, 1)], 2),
+])
+def test_matches_serial_search(pool, rows, cols, k, moves, depth):
+    board = play(mnk.initial_state(rows, cols, k), moves)
+    board.game.table.clear()
+    score, _ = mnk.Search(board.game).root(board, depth)
+    action = parallel.minimax(board, depth, pool)
+    assert action in mnk.actions(board)
+    assert parallel.last_search["score"] == score
+    assert parallel.last_search["depth"] == depth
+    assert parallel.last_search["nodes"] > 0
+    # Workers raised the shared alpha to the best score found
+    assert pool.shared[1] == score
+    # The chosen move is worth the score found for it
+    cell = action[0] * cols + action[1]
+    assert mnk.Search(board.game).move_score(board, cell, depth) == score
+
+
+def test_takes_win(pool):
+    board = play(mnk.initial_state(7, 7, 5), [
+        (3, 1), (0, 0), (3, 2), (0, 6), (3, 3), (6, 0), (3, 4), (6, 6),
+    ])
+    assert parallel.minimax(board, 2, pool) in {(3, 0), (3, 5)}
+    assert parallel.last_search["score"] == mnk.WIN
+
+
+def test_iterative_deepening(pool):
+    # A game no other test plays, so the workers' tables hold no deeper
+    # results for these positions
+    board = play(mnk.initial_state(6, 7, 4), [(3, 3), (2, 2), (3, 4)])
+    score, _ = mnk.Search(board.game).root(board, 3)
+    board.game.table.clear()
+    action = mnk.minimax(board, budget=None, max_depth=3, use_book=False, pool=pool)
+    assert action in mnk.actions(board)
+    stats = mnk.search_stats()
+    assert stats["depth"] == 3
+    assert stats["score"] == score
+    assert stats["nodes"] > 0
+
+
+def test_time_budget(pool):
+    board = play(mnk.initial_state(9, 9, 5), [(4, 4), (3, 3), (4, 5)])
+    started = time.perf_counter()
+    action = mnk.minimax(board, budget=0.2, use_book=False, pool=pool)
+    assert time.perf_counter() - started < 0.5
+    assert action in mnk.actions(board)
+    assert mnk.search_stats()["depth"] >= 1
+
+
+def test_game_over(pool):
+    board = play(mnk.initial_state(), [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)])
+    assert parallel.minimax(board, 3, pool) is None
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,145 @@
+import random
+from functools import lru_cache
+
+import pytest
+import bitboard
+import tictactoe
+from transposition import EXACT, LOWER, UPPER, TranspositionTable, symmetries
+
+
+def plain_value(board):
+    """
+    Returns the minimax value of `board` without pruning or symmetry.
+    """
+    return plain_rows_value(tuple(map(tuple, board)))
+
+
+@lru_cache(maxsize=None)
+def plain_rows_value(rows):
+    board = [list(row) for row in rows]
+    if tictactoe.terminal(board):
+        return tictactoe.utility(board)
+    values = [plain_value(tictactoe.result(board, action)) for action in tictactoe.actions(board)]
+    return max(values) if tictactoe.player(board) == tictactoe.X else min(values)
+
+
+def random_positions(count, seed=0):
+    """
+    Returns `count` positions reached by random moves, as nested lists.
+    """
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = tictactoe.initial_state()
+        for _ in range(rng.randrange(1, 6)):
+            if tictactoe.terminal(board):
+                break
+            board = tictactoe.result(board, rng.choice(sorted(tictactoe.actions(board))))
+        positions.append(board)
+    return positions
+
+
+@pytest.mark.parametrize("rows, cols, count", [(3, 3, 8), (4, 4, 8), (3, 5, 4)])
+def test_symmetries(rows, cols, count):
+    perms = symmetries(rows, cols)
+    assert len(perms) == count
+    assert len({tuple(perm) for perm in perms}) == count
+    for perm in perms:
+        assert sorted(perm) == list(range(rows * cols))
+
+
+def test_symmetric_positions_share_a_key():
+    table = TranspositionTable(3)
+    # X in a corner and O in the centre, in all four corners
+    keys = {
+        table.canonical(table.hashes(1 << corner, 1 << 4))[0]
+        for corner in (0, 2, 6, 8)
+    }
+    assert len(keys) == 1
+    assert table.canonical(table.hashes(1 << 1, 1 << 4))[0] not in keys
+    assert table.canonical(table.hashes(1 << 4, 1 << 0))[0] not in keys
+
+
+def test_incremental_hashes():
+    table = TranspositionTable(3, 4)
+    hashes = table.hashes(0, 0)
+    x = o = 0
+    for turn, cell in enumerate([5, 0, 11, 3, 6]):
+        hashes = table.play(hashes, turn % 2, cell)
+        if turn % 2 == 0:
+            x |= 1 << cell
+        else:
+            o |= 1 << cell
+        assert hashes == table.hashes(x, o)
+
+
+def test_moves_follow_symmetry():
+    table = TranspositionTable(3)
+    # X at top left, O at top middle: best reply stored at bottom left
+    table.store(table.hashes(1 << 0, 1 << 1), 1, -1, 1, 6)
+    # Mirrored left to right, the same move is at bottom right
+    value, move = table.probe(table.hashes(1 << 2, 1 << 1), -1, 1)
+    assert value == 1
+    assert move == 8
+
+
+@pytest.mark.parametrize("value, alpha, beta, bound", [
+    (0, -1, 1, EXACT),
+    (1, -1, 1, LOWER),
+    (-1, -1, 1, UPPER),
+])
+def test_bounds(value, alpha, beta, bound):
+    table = TranspositionTable(3)
+    hashes = table.hashes(1, 2)
+    table.store(hashes, value, alpha, beta, 4)
+    key, _ = table.canonical(hashes)
+    assert table.entries[key][2] == bound
+    # A bound only settles windows it lies outside of
+    if bound == EXACT:
+        assert table.probe(hashes, -1, 1)[0] == 0
+    if bound == LOWER:
+        assert table.probe(hashes, -1, 0)[0] == 1
+        assert table.probe(hashes, -1, 2)[0] is None
+    if bound == UPPER:
+        assert table.probe(hashes, 0, 1)[0] == -1
+        assert table.probe(hashes, -2, 1)[0] is None
+
+
+def test_list_engine_values():
+    tictactoe.table.clear()
+    for board in random_positions(40):
+        if tictactoe.terminal(board):
+            continue
+        search = tictactoe.maxvalue if tictactoe.player(board) == tictactoe.X else tictactoe.minvalue
+        value, action = search(board, tictactoe.MIN, tictactoe.MAX)
+        assert value == plain_value(board)
+        assert plain_value(tictactoe.result(board, action)) == value
+    assert tictactoe.search_stats()["hits"] > 0
+
+
+def test_bitboard_engine_values():
+    bitboard.tables.clear()
+    for board in random_positions(40, seed=1):
+        if tictactoe.terminal(board):
+            continue
+        action = bitboard.minimax(board)
+        assert plain_value(tictactoe.result(board, action)) == plain_value(board)
+
+
+def test_stats():
+    tictactoe.table.clear()
+    tictactoe.maxvalue(tictactoe.initial_state(), tictactoe.MIN, tictactoe.MAX)
+    stats = tictactoe.search_stats()
+    assert 0 < stats["hits"] <= stats["probes"]
+    assert stats["hit_rate"] == stats["hits"] / stats["probes"]
+    assert stats["entries"] <= stats["stores"]
+    # Symmetry and transpositions leave a few hundred positions
+    assert stats["nodes"] < 2000
+
+    nodes = stats["nodes"]
+    tictactoe.maxvalue(tictactoe.initial_state(), tictactoe.MIN, tictactoe.MAX)
+    assert tictactoe.search_stats()["nodes"] == nodes + 1
+
+
+if __name__ == "__main__":
+    pytest.main()
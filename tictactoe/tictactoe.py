@@ -5,6 +5,9 @@ Tic Tac Toe Player
 import math
 import copy
 
+import book
+from transposition import TranspositionTable
+
 MAX = float('inf')
 MIN = float('-inf')
 X = "X"
@@ -12,6 +15,9 @@ O = "O"
 EMPTY = None
 N = 3
 
+# Search results kept between calls to minimax
+table = TranspositionTable(N)
+
 
 def initial_state():
     """
@@ -139,7 +145,13 @@ def utility(board):
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+    Positions in the opening book are answered from it without searching.
     """
+    if not terminal(board):
+        cell = book.lookup(*board_masks(board), N, N, N)
+        if cell is not None:
+            return divmod(cell, N)
+
     max_player = True if player(board) == X else False
     if max_player:
         _, action = maxvalue(board, MIN, MAX)
@@ -149,17 +161,67 @@ def minimax(board):
     return action
 
 
-def maxvalue(board, alpha, beta):
+def search_stats():
+    """
+    Returns the node count, hit rate and other counters of the
+    transposition table used by minimax.
+    """
+    return table.stats()
+
+
+def board_masks(board):
+    """
+    Returns the bitmasks of the cells held by X and by O.
+    """
+    x, o = 0, 0
+    for r in range(N):
+        for c in range(N):
+            if board[r][c] == X:
+                x |= 1 << (r * N + c)
+            elif board[r][c] == O:
+                o |= 1 << (r * N + c)
+    return x, o
+
+
+def board_hashes(board):
+    """
+    Returns the transposition table hashes of the board.
+    """
+    return table.hashes(*board_masks(board))
+
+
+def ordered_actions(board, move):
+    """
+    Returns the possible actions, with the cell `move` from the
+    transposition table first if there is one.
+    """
+    moves = list(actions(board))
+    if move is not None:
+        moves.remove(divmod(move, N))
+        moves.insert(0, divmod(move, N))
+    return moves
+
+
+def maxvalue(board, alpha, beta, hashes=None):
     """
     Returns the max value of all the possible move that the opponet can achieve
     """
     best_move = None
     if terminal(board):
         return utility(board), best_move
+
+    # Reuse results of this position, or of a rotation or reflection of it
+    table.nodes += 1
+    hashes = board_hashes(board) if hashes is None else hashes
+    value, move = table.probe(hashes, alpha, beta)
+    if value is not None:
+        return value, divmod(move, N)
+    start = alpha
     
     score = MIN
-    for action in list(actions(board)):
-        min_value, _ = minvalue(result(board, action), alpha, beta)
+    for action in ordered_actions(board, move):
+        child = table.play(hashes, 0, action[0] * N + action[1])
+        min_value, _ = minvalue(result(board, action), alpha, beta, child)
         if score < min_value:
             score = min_value
             best_move = action
@@ -167,21 +229,30 @@ def maxvalue(board, alpha, beta):
         alpha = max(alpha, score)
         if beta <= alpha:
             break
-    
+
+    table.store(hashes, score, start, beta, best_move[0] * N + best_move[1])
     return score, best_move
 
 
-def minvalue(board, alpha, beta):
+def minvalue(board, alpha, beta, hashes=None):
     """
     Returns the min value of all the possible move that the opponet can achieve
     """
     best_move = None
     if terminal(board):
         return utility(board), best_move
+
+    table.nodes += 1
+    hashes = board_hashes(board) if hashes is None else hashes
+    value, move = table.probe(hashes, alpha, beta)
+    if value is not None:
+        return value, divmod(move, N)
+    start = beta
     
     score = MAX
-    for action in list(actions(board)):
-        max_value, _ = maxvalue(result(board, action), alpha, beta)
+    for action in ordered_actions(board, move):
+        child = table.play(hashes, 1, action[0] * N + action[1])
+        max_value, _ = maxvalue(result(board, action), alpha, beta, child)
         if score > max_value:
             score = max_value
             best_move = action
@@ -189,6 +260,6 @@ def minvalue(board, alpha, beta):
         beta = min(beta, score)
         if beta <= alpha:
             break
-    
-    return score, best_move
 
+    table.store(hashes, score, alpha, start, best_move[0] * N + best_move[1])
+    return score, best_move
@@ -0,0 +1,185 @@
+"""
+Transposition table for Tic Tac Toe search.
+
+Positions are keyed by Zobrist hashing: every (player, cell) pair has a
+random 64-bit key, and a position hashes to the XOR of the keys of its
+occupied cells. A hash is kept for each symmetry of the board at once,
+each one hashing the position as if it were rotated or reflected, and
+the smallest of them is the key. Positions that are rotations or
+reflections of each other therefore share one entry.
+
+Entries store the value found together with its bound, because alpha-
+beta search only proves a value exactly when it falls inside the search
+window:
+
+- EXACT: the value of the position.
+- LOWER: the position is worth at least the value (a beta cutoff).
+- UPPER: the position is worth at most the value (a fail low).
+"""
+
+import random
+
+EXACT = "exact"
+LOWER = "lower"
+UPPER = "upper"
+
+
+class TranspositionTable():
+    """
+    Search results for the positions of a rows x cols board,
+    shared between positions equal up to symmetry. If `capacity` is
+    given, the table is emptied whenever a new entry would exceed it.
+    """
+
+    def __init__(self, rows, cols=None, seed=0, capacity=None):
+        cols = rows if cols is None else cols
+        self.rows = rows
+        self.cols = cols
+        self.capacity = capacity
+        rng = random.Random(seed)
+        self.keys = [[rng.getrandbits(64) for _ in range(rows * cols)] for _ in range(2)]
+        self.symmetries = symmetries(rows, cols)
+        self.inverses = [
+            [perm.index(cell) for cell in range(rows * cols)]
+            for perm in self.symmetries
+        ]
+        # Keys of each (player, cell) pair, as seen by every symmetry
+        self.moves = [
+            [tuple(keys[perm[cell]] for perm in self.symmetries) for cell in range(rows * cols)]
+            for keys in self.keys
+        ]
+        self.entries = {}
+        self.nodes = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def hashes(self, first, second):
+        """
+        Returns the hashes under every symmetry of the position where
+        the first player holds the cells of bitmask `first` and the
+        second player those of bitmask `second`.
+        """
+        hashes = (0,) * len(self.symmetries)
+        for turn, mask in enumerate((first, second)):
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                hashes = self.play(hashes, turn, bit.bit_length() - 1)
+        return hashes
+
+    def play(self, hashes, turn, cell):
+        """
+        Returns `hashes` after player `turn` (0 or 1) takes `cell`.
+        """
+        return tuple(h ^ key for h, key in zip(hashes, self.moves[turn][cell]))
+
+    def canonical(self, hashes):
+        """
+        Returns (key, symmetry): the smallest of `hashes`
+        and the index of the symmetry giving it.
+        """
+        key = min(hashes)
+        return key, hashes.index(key)
+
+    def probe(self, hashes, alpha, beta, depth=0):
+        """
+        Returns (value, move) for the position with `hashes`. `value`
+        is None unless a stored result searched at least `depth` plies
+        settles the position within the (alpha, beta) window. `move` is
+        the best move stored for the position, or None, for searching
+        first.
+        """
+        self.probes += 1
+        key, symmetry = self.canonical(hashes)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None, None
+        stored_depth, value, bound, move = entry
+        if move is not None:
+            move = self.inverses[symmetry][move]
+        if stored_depth >= depth and (
+            bound == EXACT
+            or (bound == LOWER and value >= beta)
+            or (bound == UPPER and value <= alpha)
+        ):
+            self.hits += 1
+            return value, move
+        return None, move
+
+    def store(self, hashes, value, alpha, beta, move, depth=0):
+        """
+        Stores `value` and best `move` (a cell index or None) for the
+        position with `hashes`, found by a search of `depth` plies with
+        the (alpha, beta) window it started with.
+        """
+        self.stores += 1
+        if value <= alpha:
+            bound = UPPER
+        elif value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        key, symmetry = self.canonical(hashes)
+        if move is not None:
+            move = self.symmetries[symmetry][move]
+        if self.capacity is not None and len(self.entries) >= self.capacity and key not in self.entries:
+            self.entries.clear()
+        self.entries[key] = (depth, value, bound, move)
+
+    def stats(self, since=None):
+        """
+        Returns the nodes searched, the probes and hits,
+        the hit rate, the stores and the entries held.
+        If `since` is an earlier result of `stats`, the counters
+        only cover what happened after it.
+        """
+        since = since or {}
+        nodes = self.nodes - since.get("nodes", 0)
+        probes = self.probes - since.get("probes", 0)
+        hits = self.hits - since.get("hits", 0)
+        return {
+            "nodes": nodes,
+            "probes": probes,
+            "hits": hits,
+            "hit_rate": hits / probes if probes else 0.0,
+            "stores": self.stores - since.get("stores", 0),
+            "entries": len(self.entries),
+        }
+
+    def clear(self):
+        """
+        Empties the table and resets its counters.
+        """
+        self.entries.clear()
+        self.nodes = self.probes = self.hits = self.stores = 0
+
+
+def symmetries(rows, cols):
+    """
+    Returns the symmetries of a rows x cols board as permutations,
+    where item `cell` of a permutation is the cell it maps `cell` to.
+    A square board has eight (four rotations, each possibly mirrored),
+    any other board four (identity, two mirrors and a half turn).
+    """
+    def transform(mapping):
+        return [mapping(r, c) for r in range(rows) for c in range(cols)]
+
+    last_row, last_col = rows - 1, cols - 1
+    perms = [
+        transform(lambda r, c: r * cols + c),
+        transform(lambda r, c: r * cols + last_col - c),
+        transform(lambda r, c: (last_row - r) * cols + c),
+        transform(lambda r, c: (last_row - r) * cols + last_col - c),
+    ]
+    if rows == cols:
+        perms += [
+            transform(lambda r, c: c * cols + r),
+            transform(lambda r, c: c * cols + last_col - r),
+            transform(lambda r, c: (last_row - c) * cols + r),
+            transform(lambda r, c: (last_row - c) * cols + last_col - r),
+        ]
+    return perms